@@ -1,17 +1,22 @@
 import streamlit as st
-import numpy as np
 import pandas as pd
-import duckdb
-from datetime import datetime
-import pytz
+import pyarrow as pa
+import pyarrow.parquet as pq
+import xlsxwriter
+from datetime import datetime, timezone
 import ftplib
 import io
 import os
-import glob
+import functools
+import tempfile
+import threading
+import time
+import uuid
+from urllib.parse import quote
+from concurrent.futures import ThreadPoolExecutor
 import sys
-import urllib.parse
-from azure.storage.blob import BlobServiceClient
-from configparser import ConfigParser
+from openpyxl import load_workbook
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 
 # Import feature modules
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__))))
@@ -24,6 +29,10 @@ from streamlit_feature_catalog.features.blob_navigation.var_003 import BlobNavig
 AZURE_ACCOUNT_URL = st.secrets["AZ_ACCOUNT"]
 CONTAINER_NAME = st.secrets["AZ_CONTAINER"]
 
+# DuckDB resource limits; adjust per deployment
+DUCKDB_THREADS = 4
+DUCKDB_MEMORY_LIMIT = '2GB'
+
 # Page configuration
 st.set_page_config(
     page_title="Salsify PIG Manager",
@@ -46,6 +55,18 @@ COLUMN_ORDER = [
     'USP', 'Brand'
 ]
 
+# pig_data carries Status right after About
+PIG_DATA_COLUMNS = COLUMN_ORDER[:3] + ['Status'] + COLUMN_ORDER[3:]
+
+# Vendor-managed columns (AT-BO) carried over from salsify.xlsx into the export
+VENDOR_ASSET_COLUMNS = ['Image Assets', 'PDF Assets', 'Video Assets'] + [f'VPA {i}' for i in range(1, 20)]
+
+# Narrow projection painted in the Salsify preview grid
+PREVIEW_COLUMNS = ['Item', 'Product Title', 'Category', 'Short Description', 'Brand']
+
+# Rows rendered per page in the View Salsify Data grid
+DATA_VIEW_PAGE_SIZE = 100
+
 # Mapping definitions
 FIELD_MAPPINGS = {
     # Core fields mapped from direct Excel references
@@ -81,32 +102,174 @@ ALL_MAPPINGS = {
     **SEO_BULLET_MAPPINGS,
 }
 
+
+def _parse_ref(cell_reference):
+    """Convert an Excel cell reference (e.g., 'B3') to zero-based (row, col)"""
+    return int(cell_reference[1:]) - 1, ord(cell_reference[0]) - ord('A')
+
+
+# Mapped fields and their cell positions as parallel tuples, resolved once at import
+MAPPED_FIELDS = tuple(ALL_MAPPINGS)
+MAPPED_CELLS = tuple(_parse_ref(cell_ref) for cell_ref, _ in ALL_MAPPINGS.values())
+PIG_MAX_ROW = max(row for row, _ in MAPPED_CELLS) + 1
+PIG_MAX_COL = max(col for _, col in MAPPED_CELLS) + 1
+
+# Session state defaults, applied once per session
+SESSION_DEFAULTS = {
+    'current_view': "About",
+    'df': None,
+    'con': None,
+    'filtered_df': None,
+    'uploaded_pig': None,
+    'category_values': None,
+    'status_values': None,
+    'data_loaded': False,
+    'selected_category': None,
+    'selected_status': None,
+    'authenticated': False,
+    'sas_token': None,
+    'data_version': 0,
+    'pig_data_cache': None,
+    'category_options': None,
+    'status_options': None,
+    'debug': False,
+}
+
+
 def initialize_session_state():
     """Initialize session state variables"""
-    if 'current_view' not in st.session_state:
-        st.session_state.current_view = "About"
-    if 'df' not in st.session_state:
-        st.session_state.df = None
-    if 'con' not in st.session_state:
-        st.session_state.con = None
-    if 'filtered_df' not in st.session_state:
-        st.session_state.filtered_df = None
-    if 'uploaded_pig' not in st.session_state:
-        st.session_state.uploaded_pig = None
-    if 'category_values' not in st.session_state:
-        st.session_state.category_values = None
-    if 'status_values' not in st.session_state:
-        st.session_state.status_values = None
-    if 'data_loaded' not in st.session_state:
-        st.session_state.data_loaded = False
-    if 'selected_category' not in st.session_state:
-        st.session_state.selected_category = None
-    if 'selected_status' not in st.session_state:
-        st.session_state.selected_status = None
-    if 'authenticated' not in st.session_state:
-        st.session_state.authenticated = False
-    if 'sas_token' not in st.session_state:
-        st.session_state.sas_token = None
+    for key, default in SESSION_DEFAULTS.items():
+        st.session_state.setdefault(key, default)
+    # Identifies this session in process-wide caches
+    st.session_state.setdefault('session_id', uuid.uuid4().hex)
+
+
+def debug_write(*args):
+    """st.write that only renders while the sidebar debug toggle is on"""
+    if st.session_state.get('debug'):
+        st.write(*args)
+
+
+def bump_data_version():
+    """Invalidate cached query results after writing to DuckDB"""
+    st.session_state.data_version += 1
+
+
+def clear_reference_options():
+    """Drop the cached selectbox options so they are refetched from the reference tables"""
+    st.session_state.category_options = None
+    st.session_state.status_options = None
+
+
+def get_category_options(con):
+    """Category values for the selectboxes, fetched once per session"""
+    if st.session_state.category_options is None:
+        rows = con.execute("SELECT DISTINCT category_value FROM category_values ORDER BY 1").fetchall()
+        st.session_state.category_options = [row[0] for row in rows]
+    return st.session_state.category_options
+
+
+def get_status_options(con):
+    """Status values for the selectboxes, fetched once per session"""
+    if st.session_state.status_options is None:
+        rows = con.execute("SELECT DISTINCT status_values FROM status_values ORDER BY 1").fetchall()
+        st.session_state.status_options = [row[0] for row in rows]
+    return st.session_state.status_options
+
+
+def get_pig_data(con):
+    """pig_data rows, kept in this session and re-queried only after the data version changes"""
+    cached = st.session_state.pig_data_cache
+    if cached is None or cached[0] != st.session_state.data_version:
+        cached = (st.session_state.data_version, con.execute("SELECT * FROM pig_data ORDER BY Item").df())
+        st.session_state.pig_data_cache = cached
+    return cached[1]
+
+
+@st.cache_data(show_spinner=False)
+def _parse_pig_bytes(data: bytes) -> pd.DataFrame:
+    """Parse PIG workbook bytes once per unique file, reused across reruns"""
+    return pd.read_excel(io.BytesIO(data), header=None, engine='openpyxl')
+
+
+@st.cache_data(show_spinner=False)
+def peek_cells(data: bytes, refs: tuple) -> dict:
+    """Read only the given cells (e.g. ('B3', 'B4')) from PIG workbook bytes"""
+    wb = load_workbook(io.BytesIO(data), read_only=True, data_only=True)
+    ws = wb.active
+    values = {ref: ws[ref].value for ref in refs}
+    wb.close()
+    return values
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def get_record_summary(_con, _df, session_id, version, filters):
+    """
+    Record/category/status counts for the displayed data, aggregated in DuckDB.
+    Cached per session on the loaded data version plus the filters that produced _df.
+    """
+    category_count = 'COUNT(DISTINCT "Category")' if 'Category' in _df.columns else '0'
+    status_count = 'COUNT(DISTINCT "Status")' if 'Status' in _df.columns else '0'
+
+    cursor = _con.cursor()
+    try:
+        cursor.register('summary_df', _df)
+        total, categories, statuses = cursor.execute(
+            f"SELECT COUNT(*), {category_count}, {status_count} FROM summary_df"
+        ).fetchone()
+
+        category_counts = None
+        if 'Category' in _df.columns:
+            category_counts = cursor.execute("""
+                SELECT "Category", COUNT(*) AS count
+                FROM summary_df
+                WHERE "Category" IS NOT NULL
+                GROUP BY 1
+                ORDER BY count DESC
+            """).df().set_index('Category')
+    finally:
+        cursor.close()
+
+    return total, categories, statuses, category_counts
+
+
+def dataframe_to_excel_bytes(df):
+    """
+    Render a DataFrame to xlsx bytes with xlsxwriter's constant-memory mode.
+    Rows are written in order with write_row so each one is flushed as soon as the
+    next starts; pandas' to_excel writes column by column, which that mode can't keep.
+    """
+    excel_buffer = io.BytesIO()
+    workbook = xlsxwriter.Workbook(excel_buffer, {
+        'constant_memory': True,
+        'default_date_format': 'yyyy-mm-dd hh:mm:ss',
+        'remove_timezone': True
+    })
+    worksheet = workbook.add_worksheet()
+    header_format = workbook.add_format({'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'})
+
+    worksheet.write_row(0, 0, [str(col) for col in df.columns], header_format)
+    values = df.astype(object).where(df.notna(), None)
+    for row_num, row in enumerate(values.itertuples(index=False, name=None), start=1):
+        worksheet.write_row(row_num, 0, row)
+
+    workbook.close()
+    return excel_buffer.getvalue()
+
+
+def dataframe_to_csv_bytes(con, df):
+    """Render a DataFrame to CSV bytes with DuckDB's vectorized CSV writer"""
+    # A cursor is a separate handle on the same database, safe to use off the script thread
+    cursor = con.cursor()
+    try:
+        cursor.register('export_df', df)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            export_path = os.path.join(tmp_dir, 'export.csv')
+            cursor.execute(f"COPY (SELECT * FROM export_df) TO '{export_path}' (FORMAT CSV, HEADER)")
+            with open(export_path, 'rb') as export_file:
+                return export_file.read()
+    finally:
+        cursor.close()
 
 
 def normalize_line_breaks_for_salsify(df):
@@ -132,8 +295,11 @@ def normalize_line_breaks_for_salsify(df):
     return df
 
 
+@st.cache_resource(show_spinner=False)
 def get_blob_service_client(sas_token):
-    """Create BlobServiceClient using SAS token"""
+    """Create BlobServiceClient using SAS token, shared across reruns to reuse its connection pool"""
+    # Imported lazily so pages that never touch storage skip the azure import cost
+    from azure.storage.blob import BlobServiceClient
     return BlobServiceClient(
         account_url=AZURE_ACCOUNT_URL,
         credential=sas_token  # Use token as-is
@@ -141,7 +307,19 @@ def get_blob_service_client(sas_token):
 
 
 
-def get_filtered_blob_navigator(prefix, key_prefix):
+@st.cache_resource(show_spinner=False)
+def get_container_client(sas_token, container_name):
+    """ContainerClient for a container, cached alongside the shared BlobServiceClient"""
+    return get_blob_service_client(sas_token).get_container_client(container_name)
+
+
+def blob_sas_url(sas_token, container_name, blob_name):
+    """Build an HTTPS URL for a blob, authorized by the SAS token, that DuckDB can read directly"""
+    # Partition directories carry the raw Status value, so encode it for the URL path
+    return f"{AZURE_ACCOUNT_URL.rstrip('/')}/{container_name}/{quote(blob_name, safe='/=')}?{sas_token.lstrip('?')}"
+
+
+def get_filtered_blob_navigator(prefix, key_prefix, recursive=True):
     """Helper function to create a configured BlobNavigator"""
     # Make sure the prefix uses forward slashes and ends with a slash
     normalized_prefix = prefix.replace('\\', '/').rstrip('/') + '/'
@@ -155,7 +333,8 @@ def get_filtered_blob_navigator(prefix, key_prefix):
             allowed_extensions=['.xlsx'],  # Only show Excel files
             show_file_details=True,
             timezone='US/Eastern',
-            placeholder_text=f"Search for {'PIG' if 'pig' in prefix else 'Salsify'} files..."
+            placeholder_text=f"Search for {'PIG' if 'pig' in prefix else 'Salsify'} files...",
+            recursive=recursive
         ),
         key_prefix=key_prefix
     )
@@ -234,8 +413,7 @@ def show_sidebar(con=None):
                 'selected_status'
             ]
             for key in keys_to_clear:
-                if key in st.session_state:
-                    del st.session_state[key]
+                st.session_state.pop(key, None)
 
         st.divider()
 
@@ -248,7 +426,7 @@ def show_sidebar(con=None):
 
         elif st.session_state.current_view == "PIG Management":
             # Use the filtered navigator
-            navigator = get_filtered_blob_navigator('salsify-product-info/pig-repository/', 'pig_nav')
+            navigator = get_filtered_blob_navigator('salsify-product-info/pig-repository/', 'pig_nav', recursive=False)
             selected_file = navigator.render_navigation()
 
             # Add Load Selected PIG button
@@ -271,12 +449,9 @@ def show_sidebar(con=None):
             if st.button("Manage Categories", use_container_width=True):
                 st.session_state.show_category_manager = True
                 
-            if 'uploaded_pig' in st.session_state and st.session_state.uploaded_pig:
+            if st.session_state.get('uploaded_pig'):
                 st.divider()
-                preview_df = pd.read_excel(st.session_state.uploaded_pig, header=None)
-                preview_df = preview_df.replace(['_x000D_'],[''])
-                item_number = preview_df.iloc[2, 1]  # B3 contains the Item number
-                st.session_state.uploaded_pig.seek(0)
+                item_number = peek_cells(st.session_state.uploaded_pig.getvalue(), ('B3',))['B3']  # B3 contains the Item number
                 st.download_button(
                     label=f"📥 Download {item_number}_PIG.xlsx",
                     data=st.session_state.uploaded_pig.getvalue(),
@@ -285,6 +460,9 @@ def show_sidebar(con=None):
                     use_container_width=True
                 )                
 
+            st.divider()
+            st.toggle("Show debug output", key="debug")
+
         elif st.session_state.current_view == "Upload To Salsify":
             # Use the filtered navigator
             navigator = get_filtered_blob_navigator('salsify-product-info/salsify-sftp/', 'salsify_nav')
@@ -310,13 +488,13 @@ def show_sidebar(con=None):
                     if con is not None:
                         try:
                             session_df = con.execute("""
-                                SELECT DISTINCT * EXCLUDE(Status)  REPLACE (   replace("Bullet Copy" , '_x000D_', '')   as "Bullet Copy" , replace("Spanish Bullet Copy" , '_x000D_', '')   as "Spanish Bullet Copy"   ) 
+                                SELECT * EXCLUDE(Status)  REPLACE (   replace("Bullet Copy" , '_x000D_', '')   as "Bullet Copy" , replace("Spanish Bullet Copy" , '_x000D_', '')   as "Spanish Bullet Copy"   ) 
                                 FROM pig_data 
                                 ORDER BY Item
                                     """).df()
                         except:
                             session_df = con.execute("""
-                                SELECT DISTINCT * REPLACE (   replace("Bullet Copy" , '_x000D_', '')   as "Bullet Copy" , replace("Spanish Bullet Copy" , '_x000D_', '')   as "Spanish Bullet Copy"   ) 
+                                SELECT * REPLACE (   replace("Bullet Copy" , '_x000D_', '')   as "Bullet Copy" , replace("Spanish Bullet Copy" , '_x000D_', '')   as "Spanish Bullet Copy"   ) 
                                 FROM pig_data 
                                 ORDER BY Item
                                     """).df()
@@ -331,7 +509,7 @@ def show_sidebar(con=None):
                     st.error(f"Error loading session data: {str(e)}")
 
             # Show filter options if a file is being previewed
-            if hasattr(st.session_state, 'preview_df'):
+            if st.session_state.get('preview_df') is not None:
                 st.divider()
                 st.markdown(f"**Previewing:** {st.session_state.preview_filename}")
 
@@ -352,14 +530,11 @@ def show_sidebar(con=None):
                 st.session_state.filtered_preview_df = filter_interface.render()
 
                 st.divider()
-                excel_buffer = io.BytesIO()
-                st.session_state.preview_df.to_excel(excel_buffer, index=False, engine='xlsxwriter')
-                
-                excel_buffer.seek(0)
-                
+
+                # The wide Excel export is only built when the button is clicked
                 st.download_button(
                     label="📥 Download Salsify Data",
-                    data=excel_buffer.getvalue(),
+                    data=functools.partial(dataframe_to_excel_bytes, st.session_state.preview_df),
                     file_name="salsify_export.xlsx",
                     mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
                     use_container_width=True
@@ -372,7 +547,7 @@ def show_data_filters():
     # Check if data needs to be loaded
     if st.session_state.df is None and st.session_state.con is not None:
         # Load data into DataFrame if not already loaded
-        df = st.session_state.con.execute("SELECT distinct * FROM pig_data").df()
+        df = get_pig_data(st.session_state.con)
         st.session_state.df = df
 
     if st.session_state.df is not None:
@@ -392,20 +567,19 @@ def show_data_filters():
         # Render filter interface and get filtered data
         st.session_state.filtered_df = filter_interface.render()
 
-def validate_product_name_length(df, max_length=100):
+def validate_product_name_length(product_name, max_length=100):
     """
     Validate that the Product Name in cell B4 is not more than max_length characters.
     
     Args:
-        df: Pandas DataFrame containing the Excel file data
+        product_name: Value of cell B4 in the PIG file
         max_length: Maximum allowed length for Product Name
         
     Returns:
         tuple: (is_valid, error_message)
     """
     try:
-        # Extract Product Name from cell B4
-        product_name = str(df.iloc[3, 1])  # B4 in zero-indexed DataFrame
+        product_name = str(product_name)
         
         # Check if product name is too long
         if len(product_name) > max_length:
@@ -428,17 +602,13 @@ def show_upload_controls():
         st.sidebar.subheader("Set Category")
         st.session_state.selected_category = st.sidebar.selectbox(
             "Select Category",
-            options=st.session_state.con.execute(
-                "SELECT DISTINCT category_value FROM category_values order by 1"
-            ).df()['category_value'].unique()
+            options=get_category_options(st.session_state.con)
         )
 
         st.sidebar.subheader("Set Status")
         st.session_state.selected_status = st.sidebar.selectbox(
             "Select Status",
-            options=st.session_state.con.execute(
-                "SELECT DISTINCT status_values FROM status_values order by 1"
-            ).df()['status_values'].unique()
+            options=get_status_options(st.session_state.con)
         )
 def main_content():
     """Display main content based on current view"""
@@ -447,48 +617,48 @@ def main_content():
     elif st.session_state.current_view == "View Salsify Data":
         show_data_view(st.session_state.con)
     elif st.session_state.current_view == "PIG Management":
-        if getattr(st.session_state, 'show_category_manager', False):
+        if st.session_state.get('show_category_manager', False):
             show_category_management()
         else:
             show_upload_interface(st.session_state.con)
     elif st.session_state.current_view == "Upload To Salsify":
         show_salsify_upload(st.session_state.con)
 
-def extract_cell_value(df, cell_reference):
+def extract_cell_value(rows, row, col):
     """
-    Extract value from Excel cell reference (e.g., 'B3')
+    Extract value at zero-based (row, col) from the rows read out of a PIG sheet
     Handles missing values and formatting
     """
-    if not cell_reference:
+    try:
+        value = rows[row][col]
+    except IndexError:
         return 'not in pig'
 
-    try:
-        col = cell_reference[0]
-        row = int(cell_reference[1:]) - 1
-        value = df.iloc[row][ord(col) - ord('A')]
+    # Handle empty cells
+    if value is None:
+        return 'not in pig'
 
-        # Handle NaN/None values
-        if pd.isna(value):
-            return 'not in pig'
+    # Convert to string and handle any special characters
+    return str(value).strip()
 
-        # Convert to string and handle any special characters
-        return str(value).strip()
-    except (IndexError, ValueError):
-        return 'not in pig'
+
+def run_in_threads(func, arg_list):
+    """Call func(*args) for each args tuple concurrently, keeping the Streamlit script context"""
+    ctx = get_script_run_ctx()
+
+    def call(args):
+        add_script_run_ctx(threading.current_thread(), ctx)
+        return func(*args)
+
+    with ThreadPoolExecutor(max_workers=max(len(arg_list), 1)) as executor:
+        return list(executor.map(call, arg_list))
 
 
 def download_from_blob(sas_token, container_name, blob_name, local_dir, filename):
     """Download file from Azure Blob Storage using SAS token"""
     try:
-        # Create the BlobServiceClient using SAS token
-        account_url = "https://daorgshare.blob.core.windows.net"
-        # Create blob service client with SAS token
-        blob_service_client = BlobServiceClient(
-            account_url=f"{account_url}?{sas_token.lstrip('?')}"
-        )
-
-        # Get a blob client
-        blob_client = blob_service_client.get_container_client(container_name).get_blob_client(blob_name)
+        # Get a blob client from the cached container client for this SAS token
+        blob_client = get_container_client(sas_token, container_name).get_blob_client(blob_name)
 
         # Create full local path
         local_path = os.path.join(local_dir, filename)
@@ -496,10 +666,9 @@ def download_from_blob(sas_token, container_name, blob_name, local_dir, filename
         # Ensure directory exists
         os.makedirs(os.path.dirname(local_path), exist_ok=True)
 
-        # Download the file
+        # Stream the blob straight into the file instead of buffering it in memory
         with open(local_path, "wb") as file:
-            blob_data = blob_client.download_blob()
-            file.write(blob_data.readall())
+            blob_client.download_blob(max_concurrency=8).readinto(file)
 
         return True, local_path
     except Exception as e:
@@ -509,8 +678,7 @@ def download_from_blob(sas_token, container_name, blob_name, local_dir, filename
 def upload_to_blob(sas_token, container_name, blob_name, file_path):
     """Upload file to Azure Blob Storage"""
     try:
-        blob_service_client = get_blob_service_client(sas_token)
-        blob_client = blob_service_client.get_container_client(container_name).get_blob_client(blob_name)
+        blob_client = get_container_client(sas_token, container_name).get_blob_client(blob_name)
 
         with open(file_path, "rb") as data:
             blob_client.upload_blob(data, overwrite=True)
@@ -520,23 +688,62 @@ def upload_to_blob(sas_token, container_name, blob_name, file_path):
         return False
 
 
+def connect_duckdb(temp_directory=os.path.join('local_data', 'tmp')):
+    """
+    Open the in-memory DuckDB database with explicit resource limits, so it
+    neither oversubscribes a small container nor grows past its memory quota.
+    """
+    import duckdb
+    con = duckdb.connect(database=':memory:')
+    con.execute(f"PRAGMA threads={DUCKDB_THREADS}")
+    con.execute(f"PRAGMA memory_limit='{DUCKDB_MEMORY_LIMIT}'")
+    # Large hash aggregates and joins spill here instead of failing at the limit
+    con.execute(f"PRAGMA temp_directory='{temp_directory}'")
+    # Keep remote file bytes DuckDB has already fetched, so repeated reads skip the network
+    try:
+        con.execute("SET enable_external_file_cache = true")
+    except duckdb.Error:
+        pass  # Setting only exists from duckdb 1.3
+    return con
+
+
+def create_table_from_blob(con, sas_token, table_name, select_sql, blob_name, local_dir, filename):
+    """
+    CREATE OR REPLACE table_name from select_sql, whose single ? parameter is the file to read.
+    DuckDB reads the blob directly over httpfs; if that fails the blob is downloaded and read locally.
+    """
+    import duckdb
+    create_sql = f"CREATE OR REPLACE TABLE {table_name} AS {select_sql}"
+    try:
+        con.execute(create_sql, [blob_sas_url(sas_token, st.secrets["AZ_CONTAINER"], blob_name)])
+        return True
+    except (duckdb.IOException, duckdb.HTTPException) as e:
+        # Only a failed remote read falls back; SQL and schema errors still raise
+        debug_write(f"Reading {blob_name} over httpfs failed, downloading it instead: {str(e)}")
+
+    success, local_path = download_from_blob(sas_token, st.secrets["AZ_CONTAINER"], blob_name, local_dir, filename)
+    if not success:
+        return False
+    con.execute(create_sql, [local_path])
+    return True
+
+
 def load_local_data():
     """Load data from local files into DuckDB"""
     try:
-        con = duckdb.connect(database=':memory:')
+        con = connect_duckdb()
 
-        # Load all parquet files without Azure connection
-        parquet_files = glob.glob("local_pig-info-table-*.parquet")
-        if not parquet_files:
+        # Load all parquet files without Azure connection; DuckDB expands the glob itself
+        parquet_glob = "local_pig-info-table-*.parquet"
+        if not con.execute("SELECT COUNT(*) FROM glob(?)", [parquet_glob]).fetchone()[0]:
             st.error("No local parquet files found. Please download data first.")
             return None
 
         # Create combined table from all parquet files
-        query = f"""
+        con.execute(f"""
         CREATE OR REPLACE TABLE pig_data AS 
-        SELECT *  REPLACE (   replace("Bullet Copy" , '_x000D_', '')   as "Bullet Copy" , replace("Spanish Bullet Copy" , '_x000D_', '')   as "Spanish Bullet Copy"   )  FROM read_parquet(f'az://{st.secrets["AZ_CONTAINER"]}/salsify-product-info/salsify-sftp/hbb_salsify.xlsx')
-        """
-        con.execute(query)
+        SELECT *  REPLACE (   replace("Bullet Copy" , '_x000D_', '')   as "Bullet Copy" , replace("Spanish Bullet Copy" , '_x000D_', '')   as "Spanish Bullet Copy"   )  FROM read_parquet('{parquet_glob}', union_by_name=true)
+        """)
 
         # Load reference data from local files
         con.execute("""
@@ -586,6 +793,8 @@ def show_category_management():
     with col1:
         if st.button("← Back", use_container_width=True):
             st.session_state.show_category_manager = False
+            # Reference values may have changed; refetch selectbox options
+            clear_reference_options()
             st.rerun()
 
     with col2:
@@ -626,18 +835,13 @@ def download_all_files(sas_token):  # Change parameter name from connection_stri
         'Obsolete': 'salsify-product-info/app-data/pig-info-table.parquet/Status=Obsolete/data_'
     }
 
-    for status, blob_path in status_files.items():
-        success = download_from_blob(
-            sas_token,
-            st.secrets["AZ_CONTAINER"],
-            blob_path,
-            "local_data",
-            f"pig-info-table-{status}.parquet"
-        )
-        if not success:
-            return False
+    # Download the status partitions concurrently
+    results = run_in_threads(download_from_blob, [
+        (sas_token, st.secrets["AZ_CONTAINER"], blob_path, "local_data", f"pig-info-table-{status}.parquet")
+        for status, blob_path in status_files.items()
+    ])
 
-    return True
+    return all(success for success, _ in results)
 
 
 def show_data_view(con):
@@ -648,35 +852,56 @@ def show_data_view(con):
         view_manager = BlobViewManager()
 
         # Use existing filtered_df or df from session state
-        if 'filtered_df' not in st.session_state or st.session_state.filtered_df is None:
+        if st.session_state.get('filtered_df') is None:
             st.session_state.filtered_df = st.session_state.df
 
         filtered_df = st.session_state.filtered_df
 
         if filtered_df is not None and not filtered_df.empty:
+            # The sidebar filters only apply when the displayed frame is their output
+            filters = [] if filtered_df is st.session_state.df else st.session_state.get('sidebar_pig_filter_filters', [])
+            total, categories, statuses, category_counts = get_record_summary(
+                con,
+                filtered_df,
+                st.session_state.session_id,
+                st.session_state.pig_data_cache[0],
+                filters
+            )
+
             # Show summary statistics
             col1, col2, col3 = st.columns(3)
             with col1:
-                st.metric("Total Records", len(filtered_df))
+                st.metric("Total Records", total)
             with col2:
-                st.metric("Categories", filtered_df['Category'].nunique() if 'Category' in filtered_df.columns else 0)
+                st.metric("Categories", categories)
             with col3:
-                st.metric("Status Types", filtered_df['Status'].nunique() if 'Status' in filtered_df.columns else 0)
+                st.metric("Status Types", statuses)
 
             # Category breakdown
-            if 'Category' in filtered_df.columns:
+            if category_counts is not None:
                 st.subheader("Records by Category")
-                category_counts = filtered_df['Category'].value_counts()
                 st.bar_chart(category_counts)
 
-            # Display filtered data
+            # Display filtered data one page at a time so only that slice is serialized
             st.header("Salsify Data")
-            st.dataframe(filtered_df)
+            page_count = (total - 1) // DATA_VIEW_PAGE_SIZE + 1
+            # Filters can shrink the data below the previously selected page
+            if st.session_state.get('data_view_page', 1) > page_count:
+                st.session_state.data_view_page = page_count
+            page = st.number_input(
+                f"Page (of {page_count})",
+                min_value=1,
+                max_value=page_count,
+                key="data_view_page"
+            )
+            start = (page - 1) * DATA_VIEW_PAGE_SIZE
+            st.dataframe(filtered_df.iloc[start:start + DATA_VIEW_PAGE_SIZE])
+            st.caption(f"Showing rows {start + 1}-{min(start + DATA_VIEW_PAGE_SIZE, total)} of {total}")
 
-            # Export functionality
+            # Export functionality; the CSV is only rendered when the button is clicked
             st.download_button(
                 label="Download Displayed Data (CSV)",
-                data=filtered_df.to_csv(index=False),
+                data=functools.partial(dataframe_to_csv_bytes, con, filtered_df),
                 file_name="pig_data_export.csv",
                 mime="text/csv"
             )
@@ -686,27 +911,54 @@ def show_data_view(con):
     except Exception as e:
         st.error(f"Error displaying data: {str(e)}")
 
-def process_pig_file(uploaded_file, con):
-    """Process uploaded PIG file and store in DuckDB"""
+def pig_rows_to_arrow(rows, columns=COLUMN_ORDER):
+    """Build an all-string Arrow table from a list of PIG row dicts"""
+    return pa.table({
+        col: pa.array([None if row.get(col) is None else str(row.get(col)) for row in rows], type=pa.string())
+        for col in columns
+    })
+
+
+def commit_pig_batch(con, rows):
+    """Replace the batch's items in pig_data: one delete for their old rows, one columnar append of the new ones"""
+    rows = [row for row in rows if row.get('Item') not in ('no item', 'no_item')]
+    if not rows:
+        return
+
+    con.register('pig_batch', pig_rows_to_arrow(rows, columns=PIG_DATA_COLUMNS))
     try:
-        # Read Excel file WITHOUT headers, exactly like the old version
-        df = pd.read_excel(
-            uploaded_file,
-            header=None,  # This is crucial!
-        )
+        con.execute("""
+            DELETE FROM pig_data
+            WHERE CAST("Item" AS VARCHAR) IN (SELECT "Item" FROM pig_batch)
+                OR CAST("Item" AS VARCHAR) IN ('no item', 'no_item')
+        """)
+        con.execute("""
+            INSERT INTO pig_data BY NAME
+            SELECT DISTINCT *   REPLACE (   replace("Bullet Copy" , '_x000D_', '')   as "Bullet Copy" , replace("Spanish Bullet Copy" , '_x000D_', '')   as "Spanish Bullet Copy"   )
+            FROM pig_batch
+        """)
+    finally:
+        con.unregister('pig_batch')
+    bump_data_version()
+
+
+def process_pig_file(pig_bytes, con):
+    """Process uploaded PIG file bytes and store in DuckDB"""
+    try:
+        # Open the workbook in read-only mode; only the mapped cells are read
+        wb = load_workbook(io.BytesIO(pig_bytes), read_only=True, data_only=True)
+        rows = list(wb.active.iter_rows(max_row=PIG_MAX_ROW, max_col=PIG_MAX_COL, values_only=True))
+        wb.close()
 
         # Initialize output data with default values
         output_data = {field: 'not in pig' for field in COLUMN_ORDER}
 
-        # Track processed fields for validation
-        processed_fields = set()
-
         # Map fields based on cell references using the old version's logic
-        for field, (cell_ref, default) in ALL_MAPPINGS.items():
-            if cell_ref:
-                value = extract_cell_value(df, cell_ref)
-                output_data[field] = value
-                processed_fields.add(field)
+        for field, (row, col) in zip(MAPPED_FIELDS, MAPPED_CELLS):
+            output_data[field] = extract_cell_value(rows, row, col)
+
+        # Track processed fields for validation
+        processed_fields = set(MAPPED_FIELDS)
 
         # Create validation info
         missing_fields = set(ALL_MAPPINGS.keys()) - processed_fields
@@ -716,17 +968,213 @@ def process_pig_file(uploaded_file, con):
             'total_fields': len(ALL_MAPPINGS)
         }
 
-        # Store mapped data in DuckDB
-        mapped_df = pd.DataFrame([output_data])
-        con.execute("DROP TABLE IF EXISTS temp_pig_mapped")
-        con.execute("CREATE OR REPLACE TABLE temp_pig_mapped AS FROM mapped_df  ")
+        # Store mapped data in DuckDB through a zero-copy Arrow scan
+        con.register('pig_row', pig_rows_to_arrow([output_data]))
+        con.execute("CREATE OR REPLACE TABLE temp_pig_mapped AS SELECT * FROM pig_row")
+        con.unregister('pig_row')
 
-        return True, validation_info
+        return True, validation_info, output_data
 
     except Exception as e:
         st.error(f"Error processing file: {str(e)}")
-        return False, None
+        return False, None, None
+
+
+@st.fragment
+def pig_edit_fragment(con, validation_info, pig_bytes):
+    """
+    PIG summary, field review, category/status selection and the data editor.
+    Runs as a fragment so edits here rerun only this block, not the upload and parsing above it.
+    """
+    # Summary metrics
+    st.subheader("PIG Summary")
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Processed Fields", validation_info['processed_fields'])
+    with col2:
+        st.metric("Missing Fields", validation_info['missing_fields'])
+    with col3:
+        st.metric("Total Fields", validation_info['total_fields'])
+
+    # Get mapped data; the same frame feeds the field tabs and the data editor
+    df = con.execute(" FROM temp_pig_mapped").df()
+    mapped_data = df.iloc[0]
+
+    # Show field groups
+    st.subheader("PIG Upload Information - Editable")
+    field_groups = {
+        "Core Information": ['Item', 'Product ID', 'Brand', 'Enhanced Product Name', 'Product Title'],
+        "Descriptions": ['Short Description', 'Long Description', 'USP', 'Keywords'],
+        "Bullet Points": [f'Bullet Copy {i}' for i in range(1, 11)],
+        "Features/Benefits": [f'Feature/Benefit {i}' for i in range(1, 2)] + ['FeatureBenefit 3',
+                                                                              'Feature/Benefit 4',
+                                                                              'FeatureBenefit 5'] + [
+                                 f'Feature/Benefit {i}' for i in range(6, 11)],
+        "SEO Content": [f'SEO Enhanced Bullets {i}' for i in range(1, 11)]
+    }
+
+    # One two-column table per tab instead of a pair of widgets per field
+    group_tables = {
+        group_name: pd.DataFrame({
+            'Field': fields,
+            'Value': ["🚫 Not in PIG" if mapped_data[field] == 'not in pig' else mapped_data[field] for field in fields]
+        })
+        for group_name, fields in field_groups.items()
+    }
+
+    tabs = st.tabs(list(group_tables.keys()))
+    for tab, group_table in zip(tabs, group_tables.values()):
+        with tab:
+            st.dataframe(group_table, hide_index=True, use_container_width=True, height="content")
+
+    # Category and status selection
+    col1, col2 = st.columns(2)
+    with col1:
+        st.subheader("Set Category")
+        category = st.selectbox(
+            "Select Category",
+            options=get_category_options(con),
+            key='category_select'
+        )
+
+    with col2:
+        st.subheader("Set Status")
+        status = st.selectbox(
+            "Select Status",
+            options=get_status_options(con),
+            key='status_select'
+        )
+
+    # Data View
+    st.subheader("Data View")
+    debug_write("Debug - Original DataFrame from temp_pig_mapped:")
+    debug_write(f"Shape: {df.shape}")
+    debug_write(f"Items: {df['Item'].tolist()}")
+
+    # One PIG row is edited at a time, so rows can't be added or removed
+    edited_df = st.data_editor(
+        df,
+        use_container_width=True,
+        hide_index=True,
+        num_rows="fixed",
+        height="content"
+    )
+
+    # Update Salsify button
+    if st.button("Update in app Salsify view", type="primary"):
+        try:
+            st.write("1. Starting Update Process...")
+            item_number = edited_df['Item'].iloc[0]
+            debug_write(f"Selected item_number: {item_number}")
+
+            # Debug - Show the actual data being processed
+            debug_write("Debug - Data being processed:")
+            debug_write(edited_df[edited_df['Item'] == item_number])
+
+            # Check if item exists
+            if st.session_state.debug:
+                existing_item = con.execute("""
+                    SELECT COUNT(*) as count 
+                    FROM pig_data 
+                    WHERE Item = ?
+                """, [item_number]).fetchone()[0]
+                st.write(f"2. Item {item_number} exists: {existing_item > 0}")
+
+            # Insert the edited record
+            st.write("3. Inserting edited record...")
+            edited_df['Category'] = category
+            edited_df['Status'] = status
+            edited_df = edited_df[PIG_DATA_COLUMNS]
+
+            # Blank out 'not in pig' markers on just the rows being committed
+            rows = [
+                {col: ('' if value == 'not in pig' else value) for col, value in row.items()}
+                for row in edited_df[edited_df['Item'] == item_number].to_dict('records')
+            ]
+
+            # Debug - Show data before insertion
+            debug_write("Debug - Data before insertion:")
+            debug_write(pd.DataFrame(rows, columns=PIG_DATA_COLUMNS))
+
+            # Replace the item in pig_data with one batched append
+            commit_pig_batch(con, rows)
+
+            if st.session_state.debug:
+                st.write("Debug - Checking pig_data after insertion:")
+                check_df = con.execute(" FROM pig_data WHERE Item = ?", [item_number]).df()
+                st.write(check_df)
+
+            st.write("4. Writing to parquet...")
+            # Build the status partition in memory; nothing is written to local disk.
+            # pa.table accepts both the Table and the RecordBatchReader that .arrow() returns across duckdb versions
+            partition = pa.table(con.execute("""
+                SELECT 
+
+
+                "Item", "Category", "About", "Status", replace("Bullet Copy" , '_x000D_', '')   as "Bullet Copy", "Heading",  replace("Spanish Bullet Copy" , '_x000D_', '')   as "Spanish Bullet Copy" ,
+                "Subheading", "Enhanced Product Name", "Bullet Copy 1" ,"Bullet Copy 2" ,"Bullet Copy 3"
+                ,"Bullet Copy 4","Bullet Copy 5","Bullet Copy 6", "Bullet Copy 7", "Bullet Copy 8"
+                ,"Bullet Copy 9","Bullet Copy 10","Feature/Benefit 1","Feature/Benefit 2"
+                ,"FeatureBenefit 3","Feature/Benefit 4","FeatureBenefit 5","Feature/Benefit 6"
+                ,"Feature/Benefit 7","Feature/Benefit 8","Feature/Benefit 9","Feature/Benefit 10"
+                ,"Keywords","Long Description","Product ID","Product Title","SEO Enhanced Bullets 1"
+                ,"SEO Enhanced Bullets 2","SEO Enhanced Bullets 3","SEO Enhanced Bullets 4"
+                ,"SEO Enhanced Bullets 5","SEO Enhanced Bullets 6","SEO Enhanced Bullets 7"
+                ,"SEO Enhanced Bullets 8","SEO Enhanced Bullets 9","SEO Enhanced Bullets 10"
+                ,"Short Description","USP","Brand"
+                 FROM pig_data WHERE Status = ?
+            """, [status]).arrow())
+            parquet_buffer = io.BytesIO()
+            pq.write_table(
+                partition,
+                parquet_buffer,
+                compression='zstd',
+                compression_level=6,
+                row_group_size=100_000
+            )
+            parquet_buffer.seek(0)
+
+            st.write("5. Uploading to Azure...")
+            # Upload the file
+            container_client = get_container_client(st.session_state.sas_token, st.secrets["AZ_CONTAINER"])
+            blob_path = f"salsify-product-info/app-data/pig-info-table.parquet/Status={status}/data_"
+
+            container_client.upload_blob(
+                name=blob_path,
+                data=parquet_buffer,
+                overwrite=True
+            )
+
+            st.success("✅ Successfully updated Salsify and uploaded to Azure!")
 
+            # Refresh the display data
+            st.session_state.df = get_pig_data(con)
+            st.session_state.filtered_df = st.session_state.df
+
+            try:
+                shared_container_client = get_container_client(st.session_state.sas_token, st.secrets["AZ_CONTAINER"])
+
+                # Get the item number for the filename
+                item_number = edited_df['Item'].iloc[0]
+
+                # Set filename using new format
+                blob_name = f"salsify-product-info/pig-repository/{item_number}_PIG.xlsx"  # New naming format
+
+                # Upload to blob storage
+                blob_client = shared_container_client.get_blob_client(blob_name)
+                blob_client.upload_blob(pig_bytes, overwrite=True)
+
+                st.success(f"✅ Successfully saved {blob_name} to PIG Repository!")
+            except Exception as e:
+                st.error(f"Error saving to PIG Repository: {str(e)}")
+
+            # Full-app rerun so the sidebar and views pick up the new pig_data
+            st.rerun(scope="app")
+
+        except Exception as e:
+            st.error(f"Error updating Salsify data: {str(e)}")
+            st.error(f"Detailed error: {type(e).__name__}")
+            st.error("Full traceback:")
 
 
 def show_upload_interface(con):
@@ -740,290 +1188,52 @@ def show_upload_interface(con):
     file_to_process = uploaded_file if uploaded_file is not None else st.session_state.uploaded_pig
 
     if file_to_process:
+        # Read the file once; everything below works from these bytes
+        pig_bytes = file_to_process.getvalue() if hasattr(file_to_process, 'getvalue') else file_to_process.read()
+
         try:
             # Show file preview before processing (ONLY ONCE)
             with st.expander("View PIG File", expanded=False):
                 st.info("Viewing uploaded file content. Verify the data before processing.")
-                preview_df = pd.read_excel(file_to_process, header=None)
+                preview_df = _parse_pig_bytes(pig_bytes)
                 preview_df = preview_df.replace(['_x000D_'],[''])
                 st.dataframe(preview_df)
-                file_to_process.seek(0)  # Reset file pointer after reading
             
+            # Only B3 (Item number) and B4 (Product Name) are needed up front
+            pig_cells = peek_cells(pig_bytes, ('B3', 'B4'))
+
             # Add validation here
-            is_valid, error_message = validate_product_name_length(preview_df)
+            is_valid, error_message = validate_product_name_length(pig_cells['B4'])
             if not is_valid:
                 st.error(error_message)
                 return  # Exit early if validation fails
             
             # Get Item number for file naming
-            item_number = preview_df.iloc[2, 1]  # B3 contains the Item number
+            item_number = pig_cells['B3']  # B3 contains the Item number
             
             # Add save to repository button
             if st.button("Save xlsx to PIG Repository"):
                 try:
                     # Create blob client using SAS token
-                    blob_service_client = BlobServiceClient(
-                        account_url=AZURE_ACCOUNT_URL,
-                        credential=st.session_state.sas_token
-                    )
-                    shared_container_client = blob_service_client.get_container_client(st.secrets["AZ_CONTAINER"])
+                    shared_container_client = get_container_client(st.session_state.sas_token, st.secrets["AZ_CONTAINER"])
                 
                     # Set filename using new format
-                    item_number = preview_df.iloc[2, 1]  # B3 contains the Item number
                     blob_name = f"salsify-product-info/pig-repository/{item_number} - PIG.xlsx"  # New naming format
                 
                     # Upload file to container
                     blob_client = shared_container_client.get_blob_client(blob_name)
-                    file_to_process.seek(0)  # Reset file pointer
-                    blob_client.upload_blob(file_to_process.read(), overwrite=True)
-                    file_to_process.seek(0)  # Reset file pointer for further processing
+                    blob_client.upload_blob(pig_bytes, overwrite=True)
                 
                     st.success(f"✅ Successfully saved {blob_name} to PIG Repository!")
                 except Exception as e:
                     st.error(f"Error saving to PIG Repository: {str(e)}")
 
             # Process the file into DuckDB
-            success, validation_info = process_pig_file(file_to_process, con)
+            success, validation_info, _ = process_pig_file(pig_bytes, con)
 
 
             if success:
-                # Summary metrics
-                st.subheader("PIG Summary")
-                col1, col2, col3 = st.columns(3)
-                with col1:
-                    st.metric("Processed Fields", validation_info['processed_fields'])
-                with col2:
-                    st.metric("Missing Fields", validation_info['missing_fields'])
-                with col3:
-                    st.metric("Total Fields", validation_info['total_fields'])
-
-                # Get mapped data
-                mapped_data = con.execute(" FROM temp_pig_mapped LIMIT 1").df().iloc[0]
-
-                # Show field groups
-                st.subheader("PIG Upload Information - Editable")
-                field_groups = {
-                    "Core Information": ['Item', 'Product ID', 'Brand', 'Enhanced Product Name', 'Product Title'],
-                    "Descriptions": ['Short Description', 'Long Description', 'USP', 'Keywords'],
-                    "Bullet Points": [f'Bullet Copy {i}' for i in range(1, 11)],
-                    "Features/Benefits": [f'Feature/Benefit {i}' for i in range(1, 2)] + ['FeatureBenefit 3',
-                                                                                          'Feature/Benefit 4',
-                                                                                          'FeatureBenefit 5'] + [
-                                             f'Feature/Benefit {i}' for i in range(6, 11)],
-                    "SEO Content": [f'SEO Enhanced Bullets {i}' for i in range(1, 11)]
-                }
-
-                tabs = st.tabs(list(field_groups.keys()))
-                for tab, (group_name, fields) in zip(tabs, field_groups.items()):
-                    with tab:
-                        for field in fields:
-                            col1, col2 = st.columns([1, 3])
-                            with col1:
-                                st.write(f"{field}:")
-                            with col2:
-                                value = mapped_data[field]
-                                if value == 'not in pig':
-                                    st.write("🚫 Not in PIG")
-                                else:
-                                    st.write(value)
-
-                # Category and status selection
-                col1, col2 = st.columns(2)
-                with col1:
-                    st.subheader("Set Category")
-                    category = st.selectbox(
-                        "Select Category",
-                        options=con.execute(
-                            "SELECT DISTINCT category_value FROM category_values order by 1"
-                        ).df()['category_value'].unique(),
-                        key='category_select'
-                    )
-
-                with col2:
-                    st.subheader("Set Status")
-                    status = st.selectbox(
-                        "Select Status",
-                        options=con.execute(
-                            "SELECT DISTINCT status_values FROM status_values order by 1"
-                        ).df()['status_values'].unique(),
-                        key='status_select'
-                    )
-
-                # Data View
-                st.subheader("Data View")
-                df = con.execute(" FROM temp_pig_mapped").df()
-                st.write("Debug - Original DataFrame from temp_pig_mapped:")
-                st.write(f"Shape: {df.shape}")
-                st.write(f"Items: {df['Item'].tolist()}")
-
-                edited_df = st.data_editor(
-                    df,
-                    use_container_width=True,
-                    hide_index=True,
-                    num_rows="dynamic"
-                )
-
-                # Debug info
-                st.write("Debug - Edited DataFrame:")
-                st.write(f"Shape: {edited_df.shape}")
-                st.write(f"Items in edited_df: {edited_df['Item'].tolist()}")
-                st.write(f"First item using iloc[0]: {edited_df['Item'].iloc[0]}")
-                st.write(f"First item using values[0]: {edited_df['Item'].values[0]}")
-
-                # Update Salsify button
-                if st.button("Update in app Salsify view", type="primary"):
-                    try:
-                        st.write("1. Starting Update Process...")
-                        item_number = edited_df['Item'].iloc[0]
-                        st.write(f"Selected item_number: {item_number}")
-
-                        # Debug - Show the actual data being processed
-                        st.write("Debug - Data being processed:")
-                        st.write(edited_df[edited_df['Item'] == item_number])
-
-                        # Check if item exists
-                        existing_item = con.execute("""
-                            SELECT COUNT(*) as count 
-                            FROM pig_data 
-                            WHERE Item = ?
-                        """, [item_number]).fetchone()[0]
-
-                        st.write(f"2. Item {item_number} exists: {existing_item > 0}")
-
-                        # First, delete the existing record if it exists
-                        if existing_item > 0:
-                            con.execute("DELETE FROM pig_data WHERE Item = ?", [item_number])
-
-                        # Insert the edited record
-                        st.write("3. Inserting edited record...")
-                        edited_df['Category'] = category
-                        edited_df['Status'] = status
-                        edited_df = edited_df[["Item","Category","About","Status","Bullet Copy","Heading"
-                            ,"Spanish Bullet Copy", "Subheading","Enhanced Product Name","Bullet Copy 1","Bullet Copy 2","Bullet Copy 3"
-                            ,"Bullet Copy 4","Bullet Copy 5","Bullet Copy 6","Bullet Copy 7","Bullet Copy 8"
-                            ,"Bullet Copy 9","Bullet Copy 10","Feature/Benefit 1","Feature/Benefit 2"
-                            ,"FeatureBenefit 3","Feature/Benefit 4","FeatureBenefit 5","Feature/Benefit 6"
-                            ,"Feature/Benefit 7","Feature/Benefit 8","Feature/Benefit 9","Feature/Benefit 10"
-                            ,"Keywords","Long Description","Product ID","Product Title","SEO Enhanced Bullets 1"
-                            ,"SEO Enhanced Bullets 2","SEO Enhanced Bullets 3","SEO Enhanced Bullets 4"
-                            ,"SEO Enhanced Bullets 5","SEO Enhanced Bullets 6","SEO Enhanced Bullets 7"
-                            ,"SEO Enhanced Bullets 8","SEO Enhanced Bullets 9","SEO Enhanced Bullets 10"
-                            ,"Short Description","USP","Brand"]]
-                        edited_df = edited_df.replace(['not in pig'],[''])
-
-
-                        # Debug - Show data before insertion
-                        st.write("Debug - Data before insertion:")
-                        st.write(edited_df)
-
-                        # Insert with explicit column selection
-
-                        con.execute("""
-                            CREATE OR REPLACE TABLE pig_data2 AS
-                            SELECT * FROM (
-                                SELECT * FROM pig_data WHERE Item != ? and "Item" not in  ('no item' ,'no_item')
-                                UNION BY NAME
-                                SELECT *   REPLACE (   replace("Bullet Copy" , '_x000D_', '')   as "Bullet Copy" , replace("Spanish Bullet Copy" , '_x000D_', '')   as "Spanish Bullet Copy"   ) 
-                                FROM edited_df WHERE Item = ? and "Item" not in  ('no item' ,'no_item')
-                            ) ordered
-                            ORDER BY Item
-                        """, [item_number, item_number])
-
-                        st.write("Debug - Checking pig_data2 after insertion:")
-                        check_df = con.execute(" FROM pig_data2 WHERE Item = ?", [item_number]).df()
-                        st.write(check_df)
-
-                        con.execute("""
-                            CREATE OR REPLACE TABLE pig_data AS
-                            SELECT DISTINCT * FROM pig_data2
-                        """)
-
-                        st.write("4. Writing to parquet...")
-                        # Create local directory for parquet files
-                        os.makedirs("local_data", exist_ok=True)
-
-                        # Write to parquet
-                        con.execute(f"""
-                            COPY (SELECT DISTINCT 
-                            
-                            
-                            "Item", "Category", "About", "Status", replace("Bullet Copy" , '_x000D_', '')   as "Bullet Copy", "Heading",  replace("Spanish Bullet Copy" , '_x000D_', '')   as "Spanish Bullet Copy" ,
-                            "Subheading", "Enhanced Product Name", "Bullet Copy 1" ,"Bullet Copy 2" ,"Bullet Copy 3"
-                            ,"Bullet Copy 4","Bullet Copy 5","Bullet Copy 6", "Bullet Copy 7", "Bullet Copy 8"
-                            ,"Bullet Copy 9","Bullet Copy 10","Feature/Benefit 1","Feature/Benefit 2"
-                            ,"FeatureBenefit 3","Feature/Benefit 4","FeatureBenefit 5","Feature/Benefit 6"
-                            ,"Feature/Benefit 7","Feature/Benefit 8","Feature/Benefit 9","Feature/Benefit 10"
-                            ,"Keywords","Long Description","Product ID","Product Title","SEO Enhanced Bullets 1"
-                            ,"SEO Enhanced Bullets 2","SEO Enhanced Bullets 3","SEO Enhanced Bullets 4"
-                            ,"SEO Enhanced Bullets 5","SEO Enhanced Bullets 6","SEO Enhanced Bullets 7"
-                            ,"SEO Enhanced Bullets 8","SEO Enhanced Bullets 9","SEO Enhanced Bullets 10"
-                            ,"Short Description","USP","Brand"
-                             FROM pig_data WHERE Status = ? ) 
-                            TO 'local_data/pig-info-table/Status={status}/data_' 
-                            (FORMAT PARQUET, OVERWRITE 1)
-                        """, [status])
-
-                        st.write("5. Uploading to Azure...")
-                        # Get connection string
-                        config = ConfigParser()
-                        app_path = os.path.realpath(os.path.join(os.path.abspath(''), ".."))
-                        config_file = os.path.join(app_path, "resources", 'config.ini')
-                        config.read(config_file)
-
-                        # Upload the file
-                        blob_service_client = BlobServiceClient(
-                            account_url=AZURE_ACCOUNT_URL,
-                            credential=st.session_state.sas_token
-                        )
-                        container_client = blob_service_client.get_container_client(st.secrets["AZ_CONTAINER"])
-                        blob_path = f"salsify-product-info/app-data/pig-info-table.parquet/Status={status}/data_"
-                        
-                        with open(f"local_data/pig-info-table/Status={status}/data_", "rb") as data:
-                            container_client.upload_blob(
-                                name=blob_path,
-                                data=data,
-                                overwrite=True
-                            )
-
-                        st.success("✅ Successfully updated Salsify and uploaded to Azure!")
-
-                        # Refresh the display data
-                        st.session_state.df = con.execute("SELECT DISTINCT * FROM pig_data").df()
-                        st.session_state.filtered_df = st.session_state.df
-
-                        try:
-                            blob_service_client = BlobServiceClient(
-                                account_url=AZURE_ACCOUNT_URL,
-                                credential=st.session_state.sas_token
-                            )
-                            shared_container_client = blob_service_client.get_container_client(st.secrets["AZ_CONTAINER"])
-                        
-                            # Get the item number for the filename
-                            item_number = edited_df['Item'].iloc[0]
-                            
-                            # Set filename using new format
-                            blob_name = f"salsify-product-info/pig-repository/{item_number}_PIG.xlsx"  # New naming format
-                        
-                            # Save edited data to Excel in memory
-                            excel_buffer = io.BytesIO()
-                            file_to_process.seek(0)  # Reset file pointer
-                            excel_buffer.write(file_to_process.read())
-                            excel_buffer.seek(0)
-                        
-                            # Upload to blob storage
-                            blob_client = shared_container_client.get_blob_client(blob_name)
-                            blob_client.upload_blob(excel_buffer.getvalue(), overwrite=True)
-                        
-                            st.success(f"✅ Successfully saved {blob_name} to PIG Repository!")
-                        except Exception as e:
-                            st.error(f"Error saving to PIG Repository: {str(e)}")
-                
-                        st.rerun()
-                
-                    except Exception as e:
-                        st.error(f"Error updating Salsify data: {str(e)}")
-                        st.error(f"Detailed error: {type(e).__name__}")
-                        st.error("Full traceback:")
+                pig_edit_fragment(con, validation_info, pig_bytes)
 
         except Exception as e:
             st.error(f"Error processing uploaded file: {str(e)}")
@@ -1058,121 +1268,118 @@ def load_essential_data(sas_token):
         USERNAME = st.secrets["SALSIFY_USERNAME"]
         PASSWORD = st.secrets["SALSIFY_PASSWORD"]
         
-        # Local path to save the file temporarily
-        temp_file_path = os.path.join(os.getcwd(), "temp_salsify_download.xlsx")
-        
         # Connect to FTP server
         ftp_server = ftplib.FTP(HOSTNAME, USERNAME, PASSWORD)
         
-        # Download the file
-        with open(temp_file_path, "wb") as file:
-            ftp_server.retrbinary(f"RETR hbb_salsify.xlsx", file.write)
+        # Download the file into memory
+        salsify_buffer = io.BytesIO()
+        ftp_server.retrbinary(f"RETR hbb_salsify.xlsx", salsify_buffer.write)
+        salsify_buffer.seek(0)
         
         # Close FTP connection
         ftp_server.quit()
         
         # Read the Salsify data
-        salsify_df = pd.read_excel(temp_file_path)
-        
-        # Clean up temporary file
-        if os.path.exists(temp_file_path):
-            os.remove(temp_file_path)
+        salsify_df = pd.read_excel(salsify_buffer, engine='calamine')
             
         progress_placeholder.text("Successfully loaded data from Salsify SFTP")
         
     except Exception as e:
         progress_placeholder.error(f"Error downloading from Salsify SFTP: {str(e)}")
         progress_placeholder.warning("Falling back to Azure Blob Storage data...")
-        
-        # Download active status data as fallback
-        success, active_path = download_from_blob(
-            sas_token,
-            st.secrets["AZ_CONTAINER"],
-            "salsify-product-info/app-data/pig-info-table.parquet/Status=active/data_0.parquet",
-            pig_data_dir,
-            "data_0.parquet"
-        )
-        if not success:
-            return False, None, None
-            
-        # Read from parquet as fallback
-        salsify_df = pd.read_parquet(os.path.join(pig_data_dir, "Status=active", "data_0.parquet"))
+        salsify_df = None
 
-    # Download reference data (still from Azure)
-    reference_files = {
-        'category': 'salsify-product-info/app-data/validation/category_values.csv',
-        'status': 'salsify-product-info/app-data/validation/status_values.csv'
+    # Load into DuckDB
+    con = connect_duckdb(os.path.join(base_dir, 'tmp'))
+
+    # Load Salsify data, deduplicated once here so later reads can skip DISTINCT
+    pig_data_select = """
+    SELECT distinct * REPLACE (
+        replace("Bullet Copy", '_x000D_', '') as "Bullet Copy", 
+        replace("Spanish Bullet Copy", '_x000D_', '') as "Spanish Bullet Copy"
+    ) FROM {source}
+    """
+    if salsify_df is not None:
+        con.execute("CREATE OR REPLACE TABLE pig_data AS " + pig_data_select.format(source="salsify_df"))
+    # Active status data as fallback, read straight from blob storage
+    elif not create_table_from_blob(
+        con,
+        sas_token,
+        "pig_data",
+        pig_data_select.format(source="read_parquet(?)"),
+        "salsify-product-info/app-data/pig-info-table.parquet/Status=active/data_0.parquet",
+        pig_data_dir,
+        "Status=active/data_0.parquet"
+    ):
+        return False, None, None
+
+    # Load reference data (still from Azure)
+    reference_tables = {
+        'category_values': ('salsify-product-info/app-data/validation/category_values.csv', 2),
+        'status_values': ('salsify-product-info/app-data/validation/status_values.csv', 1)
     }
 
-    for ref_type, blob_path in reference_files.items():
-        success, _ = download_from_blob(
+    for table_name, (blob_path, order_column) in reference_tables.items():
+        if not create_table_from_blob(
+            con,
             sas_token,
-            st.secrets["AZ_CONTAINER"],
+            table_name,
+            f"SELECT * FROM read_csv(?, header=true) order by {order_column}",
             blob_path,
             reference_dir,
-            f"{ref_type}_values.csv"
-        )
-        if not success:
+            f"{table_name}.csv"
+        ):
             return False, None, None
+    clear_reference_options()
 
     progress_placeholder.text("")
 
-    # Load into DuckDB
-    con = duckdb.connect(database=':memory:')
-
-    # Load Salsify data
-    con.execute("""
-    CREATE OR REPLACE TABLE pig_data AS 
-    SELECT distinct * REPLACE (
-        replace("Bullet Copy", '_x000D_', '') as "Bullet Copy", 
-        replace("Spanish Bullet Copy", '_x000D_', '') as "Spanish Bullet Copy"
-    ) FROM salsify_df
-    """)
-
-    # Load reference data
-    con.execute(f"""
-    CREATE OR REPLACE TABLE category_values AS 
-    SELECT * FROM read_csv('{os.path.join(reference_dir, "category_values.csv")}', header=true) order by 2
-    """)
-
-    con.execute(f"""
-    CREATE OR REPLACE TABLE status_values AS 
-    SELECT * FROM read_csv('{os.path.join(reference_dir, "status_values.csv")}', header=true) order by 1
-    """)
-
     return True, con, (pig_data_dir, reference_dir)
 
 
 
 def load_additional_data(sas_token, con, pig_data_dir):  # Change parameter name
-    try:
-        additional_statuses = {
-            'Obsolete': 'salsify-product-info/app-data/pig-info-table.parquet/Status=Obsolete/data_0.parquet'
-        }
+    import duckdb
+    additional_statuses = {
+        'Obsolete': 'salsify-product-info/app-data/pig-info-table.parquet/Status=Obsolete/data_0.parquet'
+    }
 
-        for status, blob_path in additional_statuses.items():
-            success, path = download_from_blob(
-                sas_token,  # Use sas_token instead of connection_string
-                st.secrets["AZ_CONTAINER"],
-                blob_path,
-                pig_data_dir,
-                f"Status={status}/data_0.parquet"
-            )
-            if success:
-                # Append to existing table using DISTINCT to avoid duplicates
-                con.execute(f"""
-                INSERT INTO pig_data 
-                SELECT DISTINCT * REPLACE (   replace("Bullet Copy" , '_x000D_', '')   as "Bullet Copy" , replace("Spanish Bullet Copy" , '_x000D_', '')   as "Spanish Bullet Copy"   )  FROM read_parquet('{os.path.join(pig_data_dir, "*", "data_0.parquet")}')
-                WHERE Status = ?
-                """, [status])
+    statuses = list(additional_statuses)
 
+    # All partitions go through one read_parquet call, which DuckDB fetches and decodes in parallel.
+    # The partitions are external blobs, so their rows are deduplicated on the way in
+    insert_sql = """
+    INSERT INTO pig_data 
+    SELECT DISTINCT * REPLACE (   replace("Bullet Copy" , '_x000D_', '')   as "Bullet Copy" , replace("Spanish Bullet Copy" , '_x000D_', '')   as "Spanish Bullet Copy"   )  FROM read_parquet(?)
+    WHERE list_contains(?, Status)
+    """
+
+    # Let DuckDB read the partitions straight from blob storage over httpfs
+    try:
+        con.execute(insert_sql, [
+            [blob_sas_url(sas_token, st.secrets["AZ_CONTAINER"], blob_path) for blob_path in additional_statuses.values()],
+            statuses
+        ])
         return True
-        
-    except:
-        pass
-    #except Exception as e:
-    #    st.error(f"Error loading additional data: {str(e)}")
-    #    return False
+    except (duckdb.IOException, duckdb.HTTPException) as e:
+        debug_write(f"Reading the additional partitions over httpfs failed, downloading them instead: {str(e)}")
+
+    # Fall back to downloading the partitions concurrently when httpfs is unavailable;
+    # download_from_blob reports each partition that fails
+    results = run_in_threads(download_from_blob, [
+        (sas_token, st.secrets["AZ_CONTAINER"], blob_path, pig_data_dir, f"Status={status}/data_0.parquet")
+        for status, blob_path in additional_statuses.items()
+    ])
+    local_paths = [path for success, path in results if success]
+    try:
+        if local_paths:
+            # Append to existing table
+            con.execute(insert_sql, [local_paths, statuses])
+    except duckdb.Error as e:
+        st.error(f"Error loading additional data: {str(e)}")
+        return False
+
+    return len(local_paths) == len(results)
 
 def show_salsify_upload(con):
     """Show Salsify upload interface"""
@@ -1190,21 +1397,23 @@ def show_salsify_upload(con):
     """)
 
     # Show preview if available
-    if hasattr(st.session_state, 'preview_df'):
+    if st.session_state.get('preview_df') is not None:
         st.subheader("File Preview")
 
         # Use the filtered data from session state if available
         display_df = st.session_state.get('filtered_preview_df', st.session_state.preview_df)
         display_df = display_df.replace(['_x000D_'],[''])
         display_df = con.sql(""" select *   REPLACE (   replace("Bullet Copy" , '_x000D_', '')   as "Bullet Copy" , replace("Spanish Bullet Copy" , '_x000D_', '')   as "Spanish Bullet Copy"   )  from         display_df """).df()
-        st.dataframe(display_df)
+
+        # Only ship a handful of columns to the browser unless asked for all of them
+        if st.checkbox("Show all columns", key="preview_all_columns"):
+            st.dataframe(display_df)
+        else:
+            st.dataframe(display_df[[col for col in PREVIEW_COLUMNS if col in display_df.columns]])
 
         if st.button("Clear Preview"):
-            del st.session_state.preview_df
-            if 'filtered_preview_df' in st.session_state:
-                del st.session_state.filtered_preview_df
-            if 'preview_filename' in st.session_state:
-                del st.session_state.preview_filename
+            for key in ('preview_df', 'filtered_preview_df', 'preview_filename'):
+                st.session_state.pop(key, None)
             st.rerun()
 
     # Add upload functionality
@@ -1214,12 +1423,63 @@ def show_salsify_upload(con):
         if st.button("Upload to Salsify", type="primary"):
             upload_to_salsify(con, st.session_state.sas_token, display_df)
 
+def merge_salsify_export(con, display_df, vendor_data):
+    """
+    Join the app-managed columns (A-AS) with the vendor's asset columns (AT-BO) on Item in DuckDB.
+    Every item from either side is kept once; app rows come first, then vendor-only items.
+    """
+    cursor = con.cursor()
+    # Row positions are taken from the frames, so "last row wins" and the output order are deterministic
+    cursor.register('session_export', display_df[COLUMN_ORDER].assign(s_pos=range(len(display_df))))
+    cursor.register('vendor_export', vendor_data[['Item'] + VENDOR_ASSET_COLUMNS].assign(v_pos=range(len(vendor_data))))
+    try:
+        # Text cells get the old fillna('') / '_x000D_' cleanup; other types keep their values
+        types = dict(cursor.execute("""
+            SELECT column_name, column_type FROM (DESCRIBE SELECT * EXCLUDE(s_pos) FROM session_export)
+            UNION ALL
+            SELECT column_name, column_type FROM (DESCRIBE SELECT * EXCLUDE("Item", v_pos) FROM vendor_export)
+        """).fetchall())
+
+        def cleaned(alias, col):
+            ref = f'{alias}."{col}"'
+            if types[col] == 'VARCHAR':
+                ref = f"COALESCE(NULLIF({ref}, '_x000D_'), '')"
+            return f'{ref} AS "{col}"'
+
+        # Each side's Item keeps its own type; they are compared as text only to match rows
+        select_list = ',\n'.join(
+            ['s."Item" AS s_item', 'v."Item" AS v_item']
+            + [cleaned('s', col) for col in COLUMN_ORDER[1:]]
+            + [cleaned('v', col) for col in VENDOR_ASSET_COLUMNS]
+        )
+        merged_df = cursor.execute(f"""
+            SELECT {select_list}
+            FROM session_export s
+            FULL OUTER JOIN vendor_export v ON CAST(s."Item" AS VARCHAR) = CAST(v."Item" AS VARCHAR)
+            QUALIFY row_number() OVER (
+                PARTITION BY COALESCE(CAST(s."Item" AS VARCHAR), CAST(v."Item" AS VARCHAR))
+                ORDER BY s.s_pos DESC NULLS LAST, v.v_pos DESC
+            ) = 1
+            ORDER BY s.s_pos NULLS LAST, v.v_pos
+        """).df()
+    finally:
+        cursor.close()
+
+    # App rows take the session Item, vendor-only rows the vendor's, as the pandas merge did
+    item = merged_df.pop('s_item').astype(object)
+    vendor_item = merged_df.pop('v_item')
+    merged_df.insert(0, 'Item', item.where(item.notna(), vendor_item.astype(object)))
+    return merged_df
+
+
 def upload_to_salsify(con, sas_token, display_df):
     """
     Read parquet data, create Excel file that combines both the vendor-managed 
     and app-managed data, then upload to Azure blob storage and Salsify SFTP
     with history backup
     """
+    # One SFTP session serves both the vendor download and the final upload
+    ftp_server = None
     try:
         # Create progress container
         progress_container = st.empty()
@@ -1230,12 +1490,12 @@ def upload_to_salsify(con, sas_token, display_df):
 
         try:
             session_df = con.execute("""
-                SELECT DISTINCT * EXCLUDE(Status) FROM pig_data 
+                SELECT * EXCLUDE(Status) FROM pig_data 
                 ORDER BY Item
             """).df()
         except:
             session_df = con.execute("""
-                SELECT DISTINCT * FROM pig_data 
+                SELECT * FROM pig_data 
                 ORDER BY Item
             """).df()
         
@@ -1247,21 +1507,16 @@ def upload_to_salsify(con, sas_token, display_df):
             USERNAME = st.secrets["SALSIFY_USERNAME"]
             PASSWORD = st.secrets["SALSIFY_PASSWORD"]
             
-            # Local path to save the file temporarily
-            temp_file_path = os.path.join(os.getcwd(), "temp_salsify_download.xlsx")
-            
-            # Connect to FTP server
+            # Connect to FTP server; the session stays open for the upload in step 7
             ftp_server = ftplib.FTP(HOSTNAME, USERNAME, PASSWORD)
             
-            # Download the file
-            with open(temp_file_path, "wb") as file:
-                ftp_server.retrbinary(f"RETR salsify.xlsx", file.write)
-            
-            # Close FTP connection
-            ftp_server.quit()
+            # Download the file into memory
+            vendor_buffer = io.BytesIO()
+            ftp_server.retrbinary(f"RETR salsify.xlsx", vendor_buffer.write)
+            vendor_buffer.seek(0)
             
             # Read the vendor file (all columns)
-            vendor_df = pd.read_excel(temp_file_path)
+            vendor_df = pd.read_excel(vendor_buffer, engine='calamine')
             
             # Identify 'Item' column and columns AT-BO
             # For Item, assume it's in column A
@@ -1285,10 +1540,6 @@ def upload_to_salsify(con, sas_token, display_df):
                 progress_container.warning(f"Vendor file doesn't contain expected columns AT-BO. Using session data only.")
                 vendor_data = None
                 
-            # Clean up temporary file
-            if os.path.exists(temp_file_path):
-                os.remove(temp_file_path)
-                
         except Exception as e:
             progress_container.warning(f"Could not download or process vendor's Salsify data: {str(e)}. Continuing with session data only.")
             vendor_data = None
@@ -1297,80 +1548,37 @@ def upload_to_salsify(con, sas_token, display_df):
         progress_container.info("Merging data...")
         
         if vendor_data is not None and not vendor_data.empty:
-            # Get all unique items
-            all_items = pd.Series(pd.concat([display_df['Item'], vendor_data['Item']]).unique())
-            
-            # Create a merged dataframe with all items
-            merged_df = pd.DataFrame({'Item': all_items})
-            
-            # Left join with session data (columns A-AS)
-            merged_df = merged_df.merge(display_df[['Item', 'Category', 'About', 'Bullet Copy', 'Heading', 'Spanish Bullet Copy', 'Subheading', 
-                                                    'Enhanced Product Name', 'Bullet Copy 1', 'Bullet Copy 2', 'Bullet Copy 3', 'Bullet Copy 4', 'Bullet Copy 5', 
-                                                    'Bullet Copy 6', 'Bullet Copy 7', 'Bullet Copy 8', 'Bullet Copy 9', 'Bullet Copy 10', 'Feature/Benefit 1', 
-                                                    'Feature/Benefit 2', 'FeatureBenefit 3', 'Feature/Benefit 4', 'FeatureBenefit 5', 'Feature/Benefit 6', 
-                                                    'Feature/Benefit 7', 'Feature/Benefit 8', 'Feature/Benefit 9', 'Feature/Benefit 10', 'Keywords', 'Long Description', 
-                                                    'Product ID', 'Product Title', 'SEO Enhanced Bullets 1', 'SEO Enhanced Bullets 2', 'SEO Enhanced Bullets 3', 
-                                                    'SEO Enhanced Bullets 4', 'SEO Enhanced Bullets 5', 'SEO Enhanced Bullets 6', 'SEO Enhanced Bullets 7', 
-                                                    'SEO Enhanced Bullets 8', 'SEO Enhanced Bullets 9', 'SEO Enhanced Bullets 10', 'Short Description', 'USP',
-                                                    'Brand']], how='left', on='Item')
-            
-            # Left join with vendor data for AT-BO columns
-            merged_df = merged_df.merge(
-                vendor_data[['Item', 'Image Assets', 'PDF Assets', 'Video Assets', 'VPA 1', 'VPA 2', 'VPA 3', 'VPA 4', 'VPA 5', 'VPA 6', 'VPA 7', 
-                             'VPA 8', 'VPA 9', 'VPA 10', 'VPA 11', 'VPA 12', 'VPA 13', 'VPA 14', 'VPA 15', 'VPA 16', 'VPA 17', 'VPA 18', 'VPA 19']], 
-                how='left', 
-                on='Item'
-            )
-            
-            # Concatenate vendor data and merged data to ensure no records are lost
-            merged_df = pd.concat([vendor_data, merged_df])
-            
-            # Fill NA values with empty strings
-            merged_df = merged_df.fillna('')
-            
-            # Replace problematic characters
-            merged_df = merged_df.replace(['_x000D_'],[''])
-            
-            # Drop duplicates keeping the last occurrence
-            merged_df = merged_df.drop_duplicates(subset=['Item'], keep='last')
-
-            merged_df = merged_df[['Item', 'Category', 'About', 'Bullet Copy', 'Heading', 'Spanish Bullet Copy', 'Subheading', 'Enhanced Product Name', 
-                                   'Bullet Copy 1', 'Bullet Copy 2', 'Bullet Copy 3', 'Bullet Copy 4', 'Bullet Copy 5', 'Bullet Copy 6', 'Bullet Copy 7', 
-                                   'Bullet Copy 8', 'Bullet Copy 9', 'Bullet Copy 10', 'Feature/Benefit 1', 'Feature/Benefit 2', 'FeatureBenefit 3',
-                                   'Feature/Benefit 4', 'FeatureBenefit 5', 'Feature/Benefit 6', 'Feature/Benefit 7', 'Feature/Benefit 8', 'Feature/Benefit 9',
-                                   'Feature/Benefit 10', 'Keywords', 'Long Description', 'Product ID', 'Product Title', 'SEO Enhanced Bullets 1', 'SEO Enhanced Bullets 2', 
-                                   'SEO Enhanced Bullets 3', 'SEO Enhanced Bullets 4', 'SEO Enhanced Bullets 5', 'SEO Enhanced Bullets 6', 'SEO Enhanced Bullets 7',
-                                   'SEO Enhanced Bullets 8', 'SEO Enhanced Bullets 9', 'SEO Enhanced Bullets 10', 'Short Description', 'USP', 'Brand', 'Image Assets', 
-                                   'PDF Assets', 'Video Assets', 'VPA 1', 'VPA 2', 'VPA 3', 'VPA 4', 'VPA 5', 'VPA 6', 'VPA 7', 'VPA 8', 'VPA 9', 'VPA 10', 
-                                   'VPA 11', 'VPA 12', 'VPA 13', 'VPA 14', 'VPA 15', 'VPA 16', 'VPA 17', 'VPA 18', 'VPA 19']]
+            merged_df = merge_salsify_export(con, display_df, vendor_data)
         
         # Step 4: Create Excel file in memory
         progress_container.info("Creating combined Excel file...")
-        excel_buffer = io.BytesIO()
-        merged_df.to_excel(excel_buffer, index=False, engine='xlsxwriter')
-        excel_buffer.seek(0)
+        excel_buffer = io.BytesIO(dataframe_to_excel_bytes(merged_df))
         
         # Step 5: Create backup of existing file in Azure
         progress_container.info("Creating Azure backup...")
-        blob_service_client = BlobServiceClient(
-            account_url=AZURE_ACCOUNT_URL,
-            credential=sas_token
-        )
-        container_client = blob_service_client.get_container_client(st.secrets["AZ_CONTAINER"])
+        container_client = get_container_client(sas_token, st.secrets["AZ_CONTAINER"])
         
         # Generate timestamp for backup
-        timestamp = datetime.now(pytz.UTC).strftime("%Y%m%d_%H%M%S")
+        timestamp = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
         
         # Check if current file exists and create backup
         try:
             blob_client = container_client.get_blob_client("salsify-product-info/salsify-sftp/hbb_salsify.xlsx")
-            existing_data = blob_client.download_blob()
             
-            # Upload to history with timestamp
+            # Copy to history with timestamp server-side; the bytes never pass through the app
             history_blob_client = container_client.get_blob_client(
                 f"salsify-product-info/salsify-sftp/history/hbb_salsify-{timestamp}.xlsx"
             )
-            history_blob_client.upload_blob(existing_data.readall(), overwrite=True)
+            copy = history_blob_client.start_copy_from_url(blob_client.url)
+            copy_status = copy['copy_status']
+            
+            # The copy must finish before the source is overwritten below
+            deadline = time.monotonic() + 60
+            while copy_status == 'pending' and time.monotonic() < deadline:
+                time.sleep(0.5)
+                copy_status = history_blob_client.get_blob_properties().copy.status
+            if copy_status != 'success':
+                raise RuntimeError(f"backup copy did not complete (status: {copy_status})")
             progress_container.info("Azure backup created successfully")
         except Exception as e:
             progress_container.warning(f"No existing file found or Azure backup failed: {str(e)}")
@@ -1380,14 +1588,7 @@ def upload_to_salsify(con, sas_token, display_df):
         blob_client = container_client.get_blob_client("salsify-product-info/salsify-sftp/hbb_salsify.xlsx")
         blob_client.upload_blob(excel_buffer.getvalue(), overwrite=True)
         
-        # Step 7: Save Excel file temporarily for SFTP upload
-        progress_container.info("Preparing for SFTP upload...")
-        temp_file_path = os.path.join(os.getcwd(), "temp_hbb_salsify.xlsx")
-        with open(temp_file_path, "wb") as temp_file:
-            excel_buffer.seek(0)
-            temp_file.write(excel_buffer.getvalue())
-        
-        # Step 8: Upload to Salsify SFTP
+        # Step 7: Upload to Salsify SFTP straight from the in-memory workbook
         progress_container.info("Uploading to Salsify SFTP...")
         try:
             # SFTP Connection details
@@ -1395,25 +1596,27 @@ def upload_to_salsify(con, sas_token, display_df):
             USERNAME = st.secrets["SALSIFY_USERNAME"]
             PASSWORD = st.secrets["SALSIFY_PASSWORD"]
             
-            # Connect to FTP server
-            ftp_server = ftplib.FTP(HOSTNAME, USERNAME, PASSWORD)
-            
-            # Upload the file
-            with open(temp_file_path, "rb") as file:
-                ftp_server.storbinary(f"STOR hbb_salsify.xlsx", file)
+            # Reuse the session from step 2, reconnecting once if it was dropped meanwhile
+            excel_buffer.seek(0)
+            try:
+                if ftp_server is None:
+                    raise ftplib.Error("no open session")
+                ftp_server.storbinary(f"STOR hbb_salsify.xlsx", excel_buffer)
+            except ftplib.all_errors:
+                if ftp_server is not None:
+                    ftp_server.close()
+                ftp_server = ftplib.FTP(HOSTNAME, USERNAME, PASSWORD)
+                excel_buffer.seek(0)
+                ftp_server.storbinary(f"STOR hbb_salsify.xlsx", excel_buffer)
             
             # Close FTP connection
             ftp_server.quit()
+            ftp_server = None
             progress_container.info("SFTP upload completed successfully")
             
         except Exception as e:
             progress_container.error(f"SFTP upload failed: {str(e)}")
             raise e
-            
-        finally:
-            # Clean up temporary file
-            if os.path.exists(temp_file_path):
-                os.remove(temp_file_path)
         
         # Success message
         progress_container.success("✅ Upload to both Azure and Salsify SFTP completed successfully!")
@@ -1428,17 +1631,26 @@ def upload_to_salsify(con, sas_token, display_df):
     except Exception as e:
         progress_container.error(f"Error during upload process: {str(e)}")
         return False
+
+    finally:
+        if ftp_server is not None:
+            ftp_server.close()
             
 def validate_sas(sas_token):
+    from azure.core.exceptions import ResourceNotFoundError
     try:
-        blob_service_client = BlobServiceClient(
-            account_url=AZURE_ACCOUNT_URL,
-            credential=sas_token
-        )
-        container_client = blob_service_client.get_container_client(st.secrets["AZ_CONTAINER"])
-        # Check a path we know should exist and is under the allowed directory
-        blobs = container_client.list_blobs(name_starts_with="salsify-product-info/")
-        next(blobs, None)
+        container_client = get_container_client(sas_token, st.secrets["AZ_CONTAINER"])
+        # A single HEAD on a small blob we know exists under the allowed directory
+        try:
+            container_client.get_blob_client(
+                "salsify-product-info/app-data/validation/status_values.csv"
+            ).get_blob_properties()
+        except ResourceNotFoundError:
+            # The reference file is missing; fall back to listing at most one blob
+            pages = container_client.list_blobs(
+                name_starts_with="salsify-product-info/", results_per_page=1
+            ).by_page()
+            next(pages, None)
         return True
     except Exception as e:
         st.error(f"SAS validation error: {str(e)}")
@@ -1460,7 +1672,7 @@ def main():
         return
 
     # Load essential data if needed
-    if 'con' not in st.session_state or st.session_state.con is None:
+    if st.session_state.get('con') is None:
         if not st.session_state.data_loaded:
             with st.spinner("Loading essential data..."):
                 success, con, dirs = load_essential_data(st.session_state.sas_token)
@@ -1473,9 +1685,10 @@ def main():
                     with st.spinner("Loading additional data..."):
                         load_additional_data(st.session_state.sas_token, st.session_state.con, st.session_state.dirs[0])
                         st.session_state.additional_data_loaded = True
+                        bump_data_version()
 
                     # Load initial data
-                    df = con.execute("SELECT DISTINCT * FROM pig_data").df()
+                    df = get_pig_data(con)
                     st.session_state.df = df
                     st.session_state.filtered_df = df
                 else:
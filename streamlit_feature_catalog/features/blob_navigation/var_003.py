@@ -1,12 +1,69 @@
 # blob_navigation var_003.py
 
 from dataclasses import dataclass
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, TYPE_CHECKING
 from datetime import datetime
+from zoneinfo import ZoneInfo
 import streamlit as st
-import pytz
-from azure.storage.blob import BlobServiceClient
-from azure.core.exceptions import ResourceNotFoundError, ClientAuthenticationError
+
+if TYPE_CHECKING:
+    from azure.storage.blob import BlobServiceClient
+
+# Azure's maximum page size for List Blobs; each extra page is another round-trip
+LIST_PAGE_SIZE = 5000
+
+
+@st.cache_resource(show_spinner=False)
+def _get_bsc(account_url: str, sas_token: str) -> "BlobServiceClient":
+    """Blob service client shared across reruns and sessions for an account/SAS pair"""
+    from azure.storage.blob import BlobServiceClient
+    return BlobServiceClient(account_url=f"{account_url}?{sas_token}")
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _cached_list_blobs(
+        account_url: str,
+        sas_token: str,
+        container: str,
+        prefix: Optional[str],
+        with_details: bool,
+        recursive: bool = True
+) -> List[Dict[str, Any]]:
+    """
+    List blobs under prefix as plain dicts, so the result can be cached across reruns.
+    Without details only names are fetched, skipping per-blob properties parsing.
+    Non-recursive listings use the '/' delimiter, so only the prefix's direct children are returned.
+    Sorted case-insensitively here, so the sort runs once per cached listing.
+    """
+    container_client = _get_bsc(account_url, sas_token).get_container_client(container)
+    if not recursive:
+        # Virtual directories come back as BlobPrefix entries, which have no size
+        listing = [
+            {
+                'name': item.name,
+                'last_modified': item.last_modified,
+                'size': item.size
+            } if with_details else {'name': item.name}
+            for item in container_client.walk_blobs(name_starts_with=prefix, delimiter='/',
+                                                    results_per_page=LIST_PAGE_SIZE)
+            if not item.name.endswith('/')
+        ]
+    elif not with_details:
+        listing = [
+            {'name': name}
+            for name in container_client.list_blob_names(name_starts_with=prefix, results_per_page=LIST_PAGE_SIZE)
+        ]
+    else:
+        listing = [
+            {
+                'name': item.name,
+                'last_modified': item.last_modified,
+                'size': item.size
+            }
+            for item in container_client.list_blobs(name_starts_with=prefix, results_per_page=LIST_PAGE_SIZE)
+        ]
+    listing.sort(key=lambda item: item['name'].lower())
+    return listing
 
 
 @dataclass
@@ -14,9 +71,8 @@ class BlobItem:
     """Represents a blob item with its metadata"""
     name: str
     full_path: str
-    last_modified: datetime
+    last_modified: Optional[datetime] = None
     size: Optional[int] = None
-    content_type: Optional[str] = None
 
 
 class BlobNavigatorConfig:
@@ -32,17 +88,22 @@ class BlobNavigatorConfig:
             timezone: str = 'US/Eastern',
             placeholder_text: str = "Search for files...",
             show_file_details: bool = True,
-            path_prefix: Optional[str] = None  # New parameter for prefix filtering
+            path_prefix: Optional[str] = None,  # New parameter for prefix filtering
+            recursive: bool = True  # False lists only the direct children of path_prefix
     ):
         self.account_url = account_url.rstrip('/')
         self.sas_token = sas_token.lstrip('?')
         self.allowed_containers = allowed_containers or []
         self.allowed_extensions = allowed_extensions
+        # Lowercased once so matching is a single str.endswith(tuple) call per blob
+        self.extension_suffixes = tuple(ext.lower() for ext in allowed_extensions or ())
         self.show_hidden = show_hidden
         self.timezone = timezone
+        self.tz = ZoneInfo(timezone)  # Resolved once instead of on every render
         self.placeholder_text = placeholder_text
         self.show_file_details = show_file_details
         self.path_prefix = path_prefix.rstrip('/') + '/' if path_prefix else None  # Normalize prefix format
+        self.recursive = recursive
 
 
 class BlobNavigator:
@@ -64,67 +125,54 @@ class BlobNavigator:
             'selected_file': None,
             'error_message': None,
             'file_list': None,
-            'service_client': None
+            'file_index': None,
+            'display_names': None
         }
 
         for key, default_value in state_vars.items():
-            full_key = f"{self.key_prefix}_{key}"
-            if full_key not in st.session_state:
-                st.session_state[full_key] = default_value
-
-    def _get_blob_service_client(self) -> BlobServiceClient:
-        """Get or create Azure blob service client"""
-        state_key = f"{self.key_prefix}_service_client"
-
-        if st.session_state[state_key] is None:
-            try:
-                # Construct the full URL with SAS token
-                sas_url = f"{self.config.account_url}?{self.config.sas_token}"
-                st.session_state[state_key] = BlobServiceClient(account_url=sas_url)
-            except Exception as e:
-                self._update_state(error_message=f"Failed to create blob service client: {str(e)}")
-                raise
+            st.session_state.setdefault(f"{self.key_prefix}_{key}", default_value)
 
-        return st.session_state[state_key]
+    def _get_blob_service_client(self) -> "BlobServiceClient":
+        """Get the cached Azure blob service client for this account and SAS token"""
+        try:
+            return _get_bsc(self.config.account_url, self.config.sas_token)
+        except Exception as e:
+            self._update_state(error_message=f"Failed to create blob service client: {str(e)}")
+            raise
 
     def _list_blobs(self, container: str) -> List[BlobItem]:
         """List all blobs in the container that match the configuration"""
         try:
-            client = self._get_blob_service_client()
-            container_client = client.get_container_client(container)
             items = []
 
             # If prefix is specified, use it in the list_blobs call for better performance
             prefix = self.config.path_prefix if self.config.path_prefix else None
-            for item in container_client.list_blobs(name_starts_with=prefix):
-                if self._should_show_item(item.name):
-                    items.append(BlobItem(
-                        name=item.name,
-                        full_path=item.name,
-                        last_modified=item.last_modified,
-                        size=item.size,
-                        content_type=item.content_settings.content_type
-                    ))
-
-            return sorted(items, key=lambda x: x.name.lower())
+            listing = _cached_list_blobs(
+                self.config.account_url,
+                self.config.sas_token,
+                container,
+                prefix,
+                self.config.show_file_details,
+                self.config.recursive
+            )
+            for item in listing:
+                if self._should_show_item(item['name']):
+                    items.append(BlobItem(full_path=item['name'], **item))
+
+            # Filtering keeps the listing's sorted order
+            return items
         except Exception as e:
             self._update_state(error_message=f"Error listing blobs: {str(e)}")
             return []
 
     def _should_show_item(self, name: str) -> bool:
         """Determine if an item should be shown based on configuration"""
-        # Check prefix first if it's set
-        if self.config.path_prefix and not name.startswith(self.config.path_prefix):
-            return False
-
+        # path_prefix is already applied server-side through name_starts_with
         if not self.config.show_hidden and name.startswith('.'):
             return False
 
-        if not self.config.allowed_extensions:
-            return True
-
-        return any(name.lower().endswith(ext.lower())
-                   for ext in self.config.allowed_extensions)
+        suffixes = self.config.extension_suffixes
+        return not suffixes or name.lower().endswith(suffixes)
 
     def render_navigation(self) -> Optional[str]:
         """Render the navigation interface"""
@@ -137,47 +185,41 @@ class BlobNavigator:
             container = self.config.allowed_containers[0]
             self._update_state(current_container=container)
 
-            # Get or update file list
-            if self._state['file_list'] is None:
-                self._update_state(file_list=self._list_blobs(container))
+            # Re-list on demand; otherwise the listing is served from cache
+            if st.button("🔄 Refresh", key=f"{self.key_prefix}_refresh"):
+                _cached_list_blobs.clear()
+                self._update_state(file_list=None)
+
+            # Get or update file list; display names and the index resolving them are
+            # built once per listing rather than on every widget interaction
+            if self._get('file_list') is None:
+                file_list = self._list_blobs(container)
+                # Remove prefix from display names if prefix is set
+                plen = len(self.config.path_prefix) if self.config.path_prefix else 0
+                names = [item.name[plen:] for item in file_list]
+                self._update_state(
+                    file_list=file_list,
+                    display_names=[""] + names,
+                    file_index=dict(zip(names, file_list))
+                )
 
-            files = self._state['file_list']
+            files = self._get('file_list')
             if not files:
                 st.info(f"No files found in container: {container}")
                 if self.config.path_prefix:
                     st.info(f"Using prefix filter: {self.config.path_prefix}")
                 return None
 
-            # Remove prefix from display names if prefix is set
-            display_names = [""]
-            if self.config.path_prefix:
-                display_names.extend(
-                    item.name[len(self.config.path_prefix):]
-                    for item in files
-                )
-            else:
-                display_names.extend(item.name for item in files)
-
             # Searchable dropdown for files
             selected_display_name = st.selectbox(
                 "Select File",
-                options=display_names,
+                options=self._get('display_names'),
                 key=f"{self.key_prefix}_file_select",
                 placeholder=self.config.placeholder_text
             )
 
             if selected_display_name:
-                # Reconstruct full path if using prefix
-                full_path = (
-                    f"{self.config.path_prefix}{selected_display_name}"
-                    if self.config.path_prefix
-                    else selected_display_name
-                )
-
-                selected_file = next(
-                    (item for item in files if item.name == full_path),
-                    None
-                )
+                selected_file = self._get('file_index').get(selected_display_name)
 
                 if selected_file:
                     self._update_state(selected_file=selected_file.full_path)
@@ -189,34 +231,27 @@ class BlobNavigator:
                             if selected_file.size:
                                 st.write(f"Size: {self._format_size(selected_file.size)}")
                         with col2:
-                            local_tz = pytz.timezone(self.config.timezone)
-                            local_time = selected_file.last_modified.astimezone(local_tz)
+                            local_time = selected_file.last_modified.astimezone(self.config.tz)
                             st.write(f"Modified: {local_time.strftime('%Y-%m-%d %I:%M %p')}")
 
             # Error handling
-            if self._state['error_message']:
-                st.error(self._state['error_message'])
+            if self._get('error_message'):
+                st.error(self._get('error_message'))
                 self._update_state(error_message=None)
 
-            return self._state['selected_file']
+            return self._get('selected_file')
 
         except Exception as e:
             st.error(f"Navigation error: {str(e)}")
             return None
 
-    @property
-    def _state(self) -> Dict[str, Any]:
-        """Get current state variables"""
-        return {
-            key.replace(f"{self.key_prefix}_", ''): st.session_state[key]
-            for key in st.session_state
-            if key.startswith(self.key_prefix)
-        }
+    def _get(self, key: str) -> Any:
+        """Get a single state variable"""
+        return st.session_state[f"{self.key_prefix}_{key}"]
 
     def _update_state(self, **kwargs):
         """Update session state variables"""
-        for key, value in kwargs.items():
-            st.session_state[f"{self.key_prefix}_{key}"] = value
+        st.session_state.update({f"{self.key_prefix}_{key}": value for key, value in kwargs.items()})
 
     @staticmethod
     def _format_size(size_bytes: int) -> str:
@@ -227,13 +262,15 @@ class BlobNavigator:
             size_bytes /= 1024
         return f"{size_bytes:.1f} PB"
 
-    def load_file_content(self, blob_path: str) -> Optional[bytes]:
+    def load_file_content(self, blob_path: str, max_concurrency: int = 4) -> Optional[bytes]:
         """Load the content of a selected file"""
         try:
             client = self._get_blob_service_client()
-            container_client = client.get_container_client(self._state['current_container'])
+            container_client = client.get_container_client(self._get('current_container'))
             blob_client = container_client.get_blob_client(blob_path)
-            return blob_client.download_blob().readall()
+            # Large blobs are fetched as parallel ranged GETs
+            downloader = blob_client.download_blob(max_concurrency=max_concurrency)
+            return downloader.readall()
         except Exception as e:
             self._update_state(error_message=f"Error loading file content: {str(e)}")
             return None
@@ -6,8 +6,14 @@ import streamlit as st
 import pandas as pd
 import io
 import json
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
 from PIL import Image
 
+# Largest image dimensions decoded for display; Streamlit scales down to the column anyway
+IMAGE_VIEW_SIZE = (1600, 1600)
+
 
 class BlobViewManager:
     """Manages view handlers for different file types"""
@@ -56,15 +62,32 @@ class BlobViewManager:
     @staticmethod
     def _view_csv(content: bytes, max_rows: int = 1000):
         """View CSV files"""
-        df = pd.read_csv(io.BytesIO(content), nrows=max_rows)
+        # Arrow's streaming reader, stopped once max_rows have been read
+        try:
+            reader = pacsv.open_csv(io.BytesIO(content), read_options=pacsv.ReadOptions(block_size=1 << 20))
+            batches, rows = [], 0
+            for batch in reader:
+                batches.append(batch)
+                rows += batch.num_rows
+                if rows >= max_rows:
+                    break
+            df = pa.Table.from_batches(batches, schema=reader.schema).slice(0, max_rows).to_pandas()
+        except pa.ArrowInvalid:
+            # Types are inferred from the first block only; a later block that doesn't fit them
+            # (e.g. text in a numeric column) fails, so fall back to pandas
+            df = pd.read_csv(io.BytesIO(content), nrows=max_rows)
         st.dataframe(df)
         return True
 
     @staticmethod
     def _view_parquet(content: bytes, max_rows: int = 1000):
         """View Parquet files"""
-        df = pd.read_parquet(io.BytesIO(content))
-        st.dataframe(df.head(max_rows))
+        # Decode only the first max_rows rows instead of the whole file
+        first_batch = next(pq.ParquetFile(io.BytesIO(content)).iter_batches(batch_size=max_rows), None)
+        if first_batch is None:
+            st.dataframe(pd.read_parquet(io.BytesIO(content), engine='pyarrow'))
+        else:
+            st.dataframe(first_batch.to_pandas())
         return True
 
     @staticmethod
@@ -81,8 +104,10 @@ class BlobViewManager:
     @staticmethod
     def _view_text(content: bytes, max_size: int = 1000):
         """View text files"""
-        text = content.decode('utf-8', errors='ignore')
-        if len(text) > max_size:
+        # Decode at most 4 bytes per character (worst-case UTF-8) instead of the whole payload
+        head = content[:max_size * 4]
+        text = head.decode('utf-8', errors='ignore')
+        if len(text) > max_size or len(content) > len(head):
             text = text[:max_size] + "..."
         st.text(text)
         return True
@@ -92,6 +117,9 @@ class BlobViewManager:
         """View image files"""
         try:
             image = Image.open(io.BytesIO(content))
+            # JPEGs decode directly at a reduced DCT scale; everything is capped before display
+            image.draft('RGB', IMAGE_VIEW_SIZE)
+            image.thumbnail(IMAGE_VIEW_SIZE, Image.BILINEAR)
             st.image(image)
             return True
         except Exception as e:
@@ -3,15 +3,49 @@
 
 
 from dataclasses import dataclass
-from typing import List, Optional, Dict, Callable
+from typing import List, Optional, Dict, Callable, TYPE_CHECKING
 import streamlit as st
 import pandas as pd
-from azure.storage.blob import BlobServiceClient
 import io
 from datetime import datetime
 import logging
 from pathlib import Path
 
+if TYPE_CHECKING:
+    from azure.storage.blob import BlobServiceClient
+
+ACCOUNT_URL = "https://daorgshare.blob.core.windows.net"
+
+
+@st.cache_resource(show_spinner=False)
+def _get_bsc(account_url: str, sas_token: str) -> "BlobServiceClient":
+    """Blob service client shared across reruns and sessions for an account/SAS pair"""
+    from azure.storage.blob import BlobServiceClient
+    return BlobServiceClient(account_url=account_url, credential=sas_token)
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _fetch_blob_bytes(account_url: str, sas_token: str, source_path: str) -> bytes:
+    """Download 'container/blob/path' once and reuse the bytes across reruns until saved or expired"""
+    container_name, blob_path = source_path.split('/', 1)
+    blob_client = _get_bsc(account_url, sas_token).get_container_client(container_name).get_blob_client(blob_path)
+    return blob_client.download_blob().readall()
+
+
+@st.cache_data(show_spinner=False)
+def _parse_values(content: bytes, file_type: str, metadata_columns: tuple) -> pd.DataFrame:
+    """Parse the source bytes and drop duplicate rows; reruns on unchanged content reuse the frame"""
+    if file_type == 'parquet':
+        df = pd.read_parquet(io.BytesIO(content), engine='pyarrow')
+    elif file_type == 'xlsx':
+        df = pd.read_excel(io.BytesIO(content))
+    else:
+        df = pd.read_csv(io.BytesIO(content))
+
+    # Drop duplicates based on non-metadata columns
+    data_columns = [col for col in df.columns if col not in metadata_columns]
+    return df.drop_duplicates(subset=data_columns, keep='first')
+
 
 @dataclass
 class CategoryManagerConfig:
@@ -35,6 +69,7 @@ class CategoryManager:
         self.sas_token = sas_token
         self._df = None
         self._metadata_columns = ['created_at', 'created_by', 'updated_at']
+        self._categorical_columns = []
         self._initialize_session_state()
         self.load_values()
 
@@ -50,16 +85,7 @@ class CategoryManager:
     def _read_data(self, content: bytes) -> pd.DataFrame:
         """Read data based on file type with proper error handling"""
         try:
-            if self.config.file_type == 'parquet':
-                df = pd.read_parquet(io.BytesIO(content))
-            elif self.config.file_type == 'xlsx':
-                df = pd.read_excel(io.BytesIO(content))
-            else:
-                df = pd.read_csv(io.BytesIO(content))
-
-            # Drop duplicates based on non-metadata columns
-            data_columns = [col for col in df.columns if col not in self._metadata_columns]
-            df = df.drop_duplicates(subset=data_columns, keep='first')
+            df = _parse_values(content, self.config.file_type, tuple(self._metadata_columns))
 
             # Initialize tracking columns if needed
             if self.config.track_changes:
@@ -68,7 +94,12 @@ class CategoryManager:
                 df['updated_at'] = df.get('updated_at', current_time)
                 df['created_by'] = df.get('created_by', st.session_state.get('user', 'unknown'))
 
-            return df.copy()
+            # Low-cardinality text columns are held as categoricals: int codes instead of a str per cell
+            for col in df.select_dtypes(include=['object']).columns:
+                if col not in self._metadata_columns and df[col].nunique() / max(len(df), 1) < 0.5:
+                    df[col] = df[col].astype('category')
+
+            return df
 
         except Exception as e:
             logging.error(f"Error reading data: {str(e)}")
@@ -79,17 +110,24 @@ class CategoryManager:
         """Write data to bytes with proper error handling"""
         try:
             buffer = io.BytesIO()
-            df_copy = df.copy()
 
-            # Clean data before writing
-            for col in df_copy.columns:
-                if df_copy[col].dtype == 'object':
-                    df_copy[col] = df_copy[col].apply(
-                        lambda x: x.strip() if isinstance(x, str) else x
-                    )
+            # Categoricals go back to plain values so the written file is unchanged
+            df = df.astype({col: object for col in df.select_dtypes(include=['category']).columns})
+
+            # Clean data before writing; only the stripped text columns are new, the rest is shared.
+            # .str.strip() yields NaN for non-string cells, which keep their original value
+            stripped = {
+                col: df[col].str.strip()
+                for col in df.select_dtypes(include=['object']).columns
+                if pd.api.types.infer_dtype(df[col], skipna=True) in ('string', 'mixed', 'mixed-integer')
+            }
+            df_copy = df.assign(**{
+                col: values.where(values.notna(), df[col])
+                for col, values in stripped.items()
+            })
 
             if self.config.file_type == 'parquet':
-                df_copy.to_parquet(buffer)
+                df_copy.to_parquet(buffer, engine='pyarrow', compression='zstd')
             elif self.config.file_type == 'xlsx':
                 df_copy.to_excel(buffer, index=False, engine='openpyxl')
             else:
@@ -102,18 +140,23 @@ class CategoryManager:
             logging.error(f"Error writing data: {str(e)}")
             raise RuntimeError(f"Failed to write data: {str(e)}")
 
+    def _refresh_categorical_columns(self):
+        """Cache the editable object columns; dtypes only change on load, add and save"""
+        self._categorical_columns = sorted([
+            col for col in self._df.select_dtypes(include=['object', 'category']).columns
+            if col not in self._metadata_columns
+        ])
+
+    def _get_blob_client(self):
+        """Blob client for source_path ('container/blob/path') on the cached service client"""
+        container_name, blob_path = self.config.source_path.split('/', 1)
+        return _get_bsc(ACCOUNT_URL, self.sas_token).get_container_client(container_name).get_blob_client(blob_path)
+
     def load_values(self) -> bool:
         """Load values from source with proper error handling"""
         try:
             if self.sas_token:
-                container_name, blob_path = self.config.source_path.split('/', 1)
-                blob_service_client = BlobServiceClient(
-                    account_url="https://daorgshare.blob.core.windows.net",
-                    credential=self.sas_token
-                )
-                container_client = blob_service_client.get_container_client(container_name)
-                blob_client = container_client.get_blob_client(blob_path)
-                content = blob_client.download_blob().readall()
+                content = _fetch_blob_bytes(ACCOUNT_URL, self.sas_token, self.config.source_path)
             else:
                 import requests
                 response = requests.get(self.config.source_path)
@@ -121,6 +164,7 @@ class CategoryManager:
                 content = response.content
     
             self._df = self._read_data(content)
+            self._refresh_categorical_columns()
             return bool(len(self._df))
     
         except Exception as e:
@@ -140,16 +184,10 @@ class CategoryManager:
     
             # Save to appropriate location
             if self.sas_token:
-                container_name, blob_path = self.config.source_path.split('/', 1)
-                blob_service_client = BlobServiceClient(
-                    account_url="https://daorgshare.blob.core.windows.net",
-                    credential=self.sas_token
-                )
-                container_client = blob_service_client.get_container_client(container_name)
-                blob_client = container_client.get_blob_client(blob_path)
-    
                 content = self._write_data(self._df)
-                blob_client.upload_blob(content, overwrite=True)
+                self._get_blob_client().upload_blob(content, overwrite=True)
+                # The next load must see what was just written
+                _fetch_blob_bytes.clear()
             else:
                 # Implement local file saving if needed
                 with open(self.config.source_path, 'wb') as f:
@@ -157,6 +195,7 @@ class CategoryManager:
                     f.write(content)
     
             st.session_state.pending_changes = False
+            self._refresh_categorical_columns()
             return True
     
         except Exception as e:
@@ -170,12 +209,15 @@ class CategoryManager:
             st.error("No data loaded")
             return
 
-        st.title("Category Manager")
+        title_col, refresh_col = st.columns([5, 1])
+        with title_col:
+            st.title("Category Manager")
+        with refresh_col:
+            if st.button("🔄 Refresh", key="category_manager_refresh"):
+                _fetch_blob_bytes.clear()
+                st.rerun()
 
-        categorical_columns = sorted([
-            col for col in self._df.select_dtypes(include=['object']).columns
-            if col not in self._metadata_columns
-        ])
+        categorical_columns = self._categorical_columns
 
         if not categorical_columns:
             st.warning("No categorical columns found in the dataset")
@@ -196,6 +238,8 @@ class CategoryManager:
         # Show value distribution
         st.subheader("Value Distribution")
         unique_values = self._df[selected_column].value_counts()
+        # Categoricals also count categories whose rows were deleted
+        unique_values = unique_values[unique_values > 0]
         st.bar_chart(unique_values)
 
         # Add new value section
@@ -217,8 +261,8 @@ class CategoryManager:
                 # Get indices to delete
                 indices_to_delete = selected_rows.index.tolist()
 
-                # Update the main DataFrame
-                self._df = self._df.drop(indices_to_delete).reset_index(drop=True)
+                # Update the main DataFrame; labels are kept, the index is dropped on write
+                self._df = self._df.loc[~self._df.index.isin(indices_to_delete)]
 
                 # Save changes immediately
                 if self.save_values():
@@ -279,11 +323,9 @@ class CategoryManager:
                     # Filter out empty values
                     new_values = {k: v for k, v in new_values.items() if v.strip() != ""}
 
-                    # Create new row DataFrame
-                    new_row = pd.DataFrame([new_values])
-
-                    # Add to main DataFrame
-                    self._df = pd.concat([self._df, new_row], ignore_index=True)
+                    # Append in place under the next free label; unset columns stay empty
+                    next_label = self._df.index.max() + 1 if len(self._df) else 0
+                    self._df.loc[next_label] = pd.Series(new_values)
 
                     # Save immediately
                     if self.save_values():
@@ -327,6 +369,11 @@ class CategoryManager:
 
             # Update the main DataFrame with the edited data
             for col in edited_df.columns:
+                if isinstance(self._df[col].dtype, pd.CategoricalDtype):
+                    # Categoricals reject values outside their categories
+                    new_categories = pd.Index(edited_df[col].dropna().unique()).difference(
+                        self._df[col].cat.categories)
+                    self._df[col] = self._df[col].cat.add_categories(new_categories)
                 self._df.loc[edited_df.index, col] = edited_df[col]
 
             st.session_state.pending_changes = True
@@ -9,8 +9,40 @@ Pandas-based implementation with similar patterns to var_001 but without DuckDB
 
 import streamlit as st
 import pandas as pd
+import numpy as np
 from typing import Union, List, Optional, Dict
 from io import BytesIO
+import os
+import hashlib
+
+# Columns with more distinct values than this are filtered by substring instead of a multiselect
+MAX_MULTISELECT_OPTIONS = 500
+
+
+@st.cache_data(show_spinner=False)
+def _read_bytes(data: bytes, columns: Optional[tuple] = None) -> pd.DataFrame:
+    """
+    Parse parquet or CSV bytes once; reruns with the same bytes reuse the frame.
+    Arrow-backed dtypes keep strings contiguous and run isin/unique in Arrow's kernels.
+    """
+    columns = list(columns) if columns else None
+    try:
+        return pd.read_parquet(BytesIO(data), engine='pyarrow', columns=columns, dtype_backend='pyarrow')
+    except:
+        return pd.read_csv(BytesIO(data), engine='pyarrow', usecols=columns, dtype_backend='pyarrow')
+
+
+@st.cache_data(show_spinner=False)
+def _read_path(path: str, mtime: float, columns: Optional[tuple] = None) -> Optional[pd.DataFrame]:
+    """Parse a data file once per modification time"""
+    columns = list(columns) if columns else None
+    if path.endswith('.parquet'):
+        return pd.read_parquet(path, engine='pyarrow', columns=columns, dtype_backend='pyarrow')
+    elif path.endswith('.csv'):
+        return pd.read_csv(path, engine='pyarrow', usecols=columns, dtype_backend='pyarrow')
+    elif path.endswith(('.xlsx', '.xls')):
+        return pd.read_excel(path, engine='calamine', usecols=columns, dtype_backend='pyarrow')
+    return None
 
 
 # We can remove num_filters from DataFilterConfig since it's no longer needed
@@ -19,10 +51,12 @@ class DataFilterConfig:
     def __init__(
             self,
             allowed_extensions: List[str] = ['.csv', '.parquet', '.xlsx'],
-            show_metrics: bool = True
+            show_metrics: bool = True,
+            columns: Optional[List[str]] = None  # Columns to read from files and offer as filters
     ):
         self.allowed_extensions = allowed_extensions
         self.show_metrics = show_metrics
+        self.columns = columns
 
 
 class DataFilter:
@@ -34,29 +68,49 @@ class DataFilter:
     ):
         self.config = config or DataFilterConfig()
         self.session_key = session_key
+        # Row masks keyed by filter prefix ((column, values), ...), reused across widgets this run
+        self._prefix_cache: Dict[tuple, np.ndarray] = {}
+        # Filter widget values snapshotted once per render; None reads session state directly
+        self._state: Optional[Dict] = None
         self._load_data(data)
 
+        # Column metadata outlives this instance for as long as the same data is loaded
+        meta_key = f"{self.session_key}_meta"
+        if st.session_state.get(meta_key, {}).get('source') != self._source:
+            st.session_state[meta_key] = {
+                'source': self._source, 'df': self.df,
+                'uniques': {}, 'filter_columns': {}, 'value_rows': {}, 'sorted': {}
+            }
+        self._meta = st.session_state[meta_key]
+
         # Initialize the active filters in session state if not present
         if f"{self.session_key}_active_filters" not in st.session_state:
             st.session_state[f"{self.session_key}_active_filters"] = 1
 
+    @property
+    def _read_columns(self) -> Optional[tuple]:
+        """Configured column subset, hashable for the cached readers"""
+        return tuple(self.config.columns) if self.config.columns else None
+
     def _load_data(self, data):
         """Load data with proper error handling"""
+        self._prefix_cache.clear()
         try:
+            # self._source identifies the loaded content: the frame object (kept alive by the
+            # metadata so its id is not reused), a hash of the bytes, or the path and mtime
             if isinstance(data, pd.DataFrame):
-                self.df = data.copy()
+                # Held by reference: DataFilter never mutates self.df, filtering returns new frames
+                self.df = data
+                self._source = ('frame', id(data))
             elif isinstance(data, bytes):
-                try:
-                    self.df = pd.read_parquet(BytesIO(data))
-                except:
-                    self.df = pd.read_csv(BytesIO(data))
+                self.df = _read_bytes(data, self._read_columns)
+                self._source = ('bytes', hashlib.sha1(data).hexdigest())
             elif isinstance(data, str):
-                if data.endswith('.parquet'):
-                    self.df = pd.read_parquet(data)
-                elif data.endswith('.csv'):
-                    self.df = pd.read_csv(data)
-                elif data.endswith(('.xlsx', '.xls')):
-                    self.df = pd.read_excel(data)
+                mtime = os.path.getmtime(data)
+                self._source = ('path', data, mtime)
+                df = _read_path(data, mtime, self._read_columns)
+                if df is not None:
+                    self.df = df
             elif hasattr(data, 'getvalue'):
                 return self._load_data(data.getvalue())
             else:
@@ -69,50 +123,187 @@ class DataFilter:
             st.error(f"Error loading data: {str(e)}")
             raise
 
-    def _get_column_type(self, column: str) -> str:
-        """Determine column type for filtering"""
-        dtype = self.df[column].dtype
-        unique_count = self.df[column].nunique()
-
-        if pd.api.types.is_string_dtype(self.df[column]):
-            return 'categorical' if unique_count <= 100 else 'text'
-        elif pd.api.types.is_numeric_dtype(self.df[column]):
-            return 'numeric'
-        elif pd.api.types.is_datetime64_any_dtype(self.df[column]):
-            return 'datetime'
-        return 'categorical'
-
-    def _apply_filters_up_to(self, filter_num: int) -> pd.DataFrame:
-        """Apply all filters up to a specific filter number"""
-        filtered_df = self.df.copy()
+    def _filter_column(self, column: str) -> pd.Series:
+        """
+        Column as used for filtering. Low-cardinality object columns are matched on a categorical
+        copy (integer codes instead of Python strings); the frame handed back keeps its dtypes.
+        """
+        filter_columns = self._meta['filter_columns']
+        if column not in filter_columns:
+            series = self.df[column]
+            # object, pandas string and Arrow string columns alike
+            if pd.api.types.is_string_dtype(series.dtype) and series.nunique() / max(len(series), 1) < 0.5:
+                series = series.astype('category')
+            filter_columns[column] = series
+        return filter_columns[column]
+
+    def _value_rows(self, column: str) -> Dict:
+        """Row positions of each value of a categorical filter column, built once per data source"""
+        value_rows = self._meta['value_rows']
+        if column not in value_rows:
+            series = self._filter_column(column)
+            value_rows[column] = series.groupby(series, observed=True).indices
+        return value_rows[column]
+
+    def _is_sorted(self, column: str) -> bool:
+        """Whether a numeric/datetime column is in ascending order, checked once per data source"""
+        sorted_columns = self._meta['sorted']
+        if column not in sorted_columns:
+            series = self.df[column]
+            sorted_columns[column] = (
+                isinstance(series.dtype, (np.dtype, pd.ArrowDtype))
+                and series.dtype.kind in 'iufM'
+                and not series.hasnans
+                and series.is_monotonic_increasing
+            )
+        return sorted_columns[column]
 
-        # Get current active filters from session state
+    def _get_filters(self, filter_num: int) -> List[Dict]:
+        """Get current active filters up to a specific filter number from session state"""
+        state = st.session_state if self._state is None else self._state
         filters = []
         for i in range(filter_num):
-            filter_col = st.session_state.get(f"{self.session_key}_filter_col_{i}", '')
-            filter_vals = st.session_state.get(f"{self.session_key}_filter_val_{i}", [])
+            filter_col = state.get(f"{self.session_key}_filter_col_{i}", '')
+            filter_vals = state.get(f"{self.session_key}_filter_val_{i}", [])
+            filter_text = state.get(f"{self.session_key}_filter_text_{i}", '')
             if filter_col and filter_vals:
-                filters.append({'column': filter_col, 'values': filter_vals})
+                filters.append({'column': filter_col, 'type': 'categorical', 'values': filter_vals})
+            elif filter_col and filter_text:
+                filters.append({'column': filter_col, 'type': 'text', 'values': filter_text})
+        return filters
+
+    @staticmethod
+    def _prefix_key(filters: List[Dict]) -> tuple:
+        """
+        Hashable, order-insensitive key for each filter's selected values. Values are kept as
+        (type, value) pairs so ones that compare or print alike (1, '1', True; NaN, None, 'nan') stay distinct.
+        """
+        return tuple(
+            (f['column'], f['values'] if f['type'] == 'text'
+             else tuple(sorted(((type(v), v) for v in f['values']), key=repr)))
+            for f in filters
+        )
+
+    def _apply_filters_mask_up_to(self, filter_num: int) -> np.ndarray:
+        """Boolean row mask for all filters up to a specific filter number"""
+        filters = self._get_filters(filter_num)
+        key = self._prefix_key(filters)
+
+        # Start from the longest prefix already computed; only the remaining filters are applied
+        start = len(key)
+        while start and key[:start] not in self._prefix_cache:
+            start -= 1
+        mask = self._prefix_cache[key[:start]] if start else np.ones(len(self.df), dtype=bool)
+
+        # AND in each remaining filter, caching every intermediate prefix
+        for i in range(start, len(filters)):
+            filter_info = filters[i]
+            column = self._filter_column(filter_info['column'])
+            if filter_info['type'] == 'text':
+                filter_mask = self._text_mask(column, filter_info['values'])
+            elif isinstance(column.dtype, pd.CategoricalDtype):
+                # Mark the selected values' rows from the index instead of scanning the column
+                value_rows = self._value_rows(filter_info['column'])
+                selected_rows = [value_rows[v] for v in filter_info['values'] if v in value_rows]
+                filter_mask = np.zeros(len(self.df), dtype=bool)
+                if selected_rows:
+                    filter_mask[np.concatenate(selected_rows)] = True
+            else:
+                filter_mask = self._sorted_mask(filter_info['column'], filter_info['values'])
+                if filter_mask is None:
+                    filter_mask = column.isin(self._isin_values(column, filter_info['values'])).to_numpy()
+            mask = mask & filter_mask
+            self._prefix_cache[key[:i + 1]] = mask
+
+        return mask
+
+    def _sorted_mask(self, column: str, values: list) -> Optional[np.ndarray]:
+        """Rows holding the selected values of a sorted column, by binary search; None if not applicable"""
+        if not self._is_sorted(column):
+            return None
+        # Sorted columns have no missing values, so Arrow-backed ones convert to plain numpy
+        column_values = self.df[column].to_numpy()
+        if column_values.dtype.kind not in 'iufM':
+            return None  # e.g. Arrow date32, which converts to datetime.date objects
+        try:
+            selected = np.asarray(values, dtype=column_values.dtype)
+        except (TypeError, ValueError):
+            return None
+
+        # Each selected value's rows are one contiguous run
+        starts = np.searchsorted(column_values, selected, side='left')
+        ends = np.searchsorted(column_values, selected, side='right')
+        mask = np.zeros(len(column_values), dtype=bool)
+        for run_start, run_end in zip(starts, ends):
+            mask[run_start:run_end] = True
+        return mask
+
+    @staticmethod
+    def _text_mask(column: pd.Series, text: str) -> np.ndarray:
+        """Rows whose value contains text, case-insensitively; missing values never match"""
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            # Match each category once and map the result through the codes; the appended
+            # False is what code -1 (missing) picks up
+            matches = column.cat.categories.astype(str).str.contains(text, case=False, regex=False)
+            return np.append(np.asarray(matches, dtype=bool), False)[column.cat.codes.to_numpy()]
+        matches = column.astype(str).str.contains(text, case=False, regex=False)
+        return (column.notna() & matches).to_numpy(dtype=bool)
+
+    @staticmethod
+    def _isin_values(column: pd.Series, values: list):
+        """Selected values as an array of the column's dtype, so isin goes straight to its hashtable"""
+        try:
+            if isinstance(column.dtype, np.dtype):
+                return np.asarray(values, dtype=column.dtype)
+            if isinstance(column.dtype, (pd.ArrowDtype, pd.StringDtype)):
+                return pd.array(values, dtype=column.dtype)
+        except (TypeError, ValueError):
+            pass
+        return values
+
+    def _unique_sorted(self, column: str, filter_num: int) -> list:
+        """Sorted non-null values of column under the preceding filters, reused across reruns"""
+        uniques = self._meta['uniques']
+        key = (column, self._prefix_key(self._get_filters(filter_num)))
+        if key not in uniques:
+            # Bounded so long sessions of changing selections don't accumulate value lists
+            if len(uniques) >= 64:
+                uniques.clear()
+            series = self._filter_column(column).iloc[self._apply_filters_mask_up_to(filter_num)]
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                # Categories are already sorted; keep those whose codes occur in the filtered rows
+                codes = series.cat.codes.to_numpy()
+                uniques[key] = list(series.cat.categories.take(np.unique(codes[codes >= 0])))
+            else:
+                values = series.dropna().unique()
+                if isinstance(values, np.ndarray) and values.dtype.kind != 'O':
+                    uniques[key] = list(np.sort(values))
+                else:
+                    uniques[key] = sorted(values)
+        return uniques[key]
 
-        # Apply each filter in sequence
-        for filter_info in filters:
-            filtered_df = filtered_df[filtered_df[filter_info['column']].isin(filter_info['values'])]
+    def _apply_filters_up_to(self, filter_num: int) -> pd.DataFrame:
+        """Apply all filters up to a specific filter number"""
+        # Nothing selected yet: the unfiltered frame is returned as is
+        if filter_num == 0 or not self._get_filters(filter_num):
+            return self.df
 
-        return filtered_df
+        # The frame is only materialized once, after every mask has been combined;
+        # positional take with the ndarray skips label alignment
+        return self.df.iloc[self._apply_filters_mask_up_to(filter_num)]
 
     def _render_filter_widget(self, filter_num: int) -> Optional[Dict]:
         """Render a single filter widget in the sidebar"""
         st.sidebar.write("")  # Add spacing
 
-        # Get the DataFrame filtered by all previous filters
-        current_filtered_df = self._apply_filters_up_to(filter_num)
-
-        # First dropdown - select the column
+        # Filtering never drops columns, so the widget needs no filtered frame; the previous
+        # filters only narrow the value options, which are taken from their cached row mask
         filter_col = st.sidebar.selectbox(
             f"Filter {filter_num + 1}:",
-            options=[''] + list(current_filtered_df.columns),
+            options=[''] + (list(self.config.columns) if self.config.columns else list(self.df.columns)),
             key=f"{self.session_key}_filter_col_{filter_num}"
         )
+        self._state[f"{self.session_key}_filter_col_{filter_num}"] = filter_col
 
         # If a column was chosen and this is the last filter, immediately add a new one
         if filter_col and filter_num == st.session_state[f"{self.session_key}_active_filters"] - 1:
@@ -121,7 +312,24 @@ class DataFilter:
         # Only show value selection if a column was chosen
         if filter_col:
             # Get unique values from the FILTERED dataset for this column
-            unique_values = sorted(current_filtered_df[filter_col].dropna().unique())
+            unique_values = self._unique_sorted(filter_col, filter_num)
+
+            # Too many values to ship as options: match a substring instead
+            if len(unique_values) > MAX_MULTISELECT_OPTIONS:
+                search_text = st.sidebar.text_input(
+                    f"Search {filter_col} ({len(unique_values):,} values):",
+                    key=f"{self.session_key}_filter_text_{filter_num}"
+                )
+                self._state[f"{self.session_key}_filter_val_{filter_num}"] = []
+                self._state[f"{self.session_key}_filter_text_{filter_num}"] = search_text
+
+                if search_text:
+                    return {
+                        'column': filter_col,
+                        'type': 'text',
+                        'values': search_text
+                    }
+                return None
 
             # Show multiselect for picking values
             selected_values = st.sidebar.multiselect(
@@ -130,6 +338,9 @@ class DataFilter:
                 default=[],  # Clear default values when filter options change
                 key=f"{self.session_key}_filter_val_{filter_num}"
             )
+            # Keep the snapshot in step with what the widget returned this run
+            self._state[f"{self.session_key}_filter_val_{filter_num}"] = selected_values
+            self._state[f"{self.session_key}_filter_text_{filter_num}"] = ''
 
             # Return filter info if values were selected
             if selected_values:
@@ -145,9 +356,20 @@ class DataFilter:
         """Render filter interface and return filtered DataFrame"""
         st.sidebar.header("Data Filters")
 
+        # Read every filter widget's value from session state once
+        num_filters = st.session_state[f"{self.session_key}_active_filters"]
+        self._state = {}
+        for i in range(num_filters):
+            for key, default in (
+                    (f"{self.session_key}_filter_col_{i}", ''),
+                    (f"{self.session_key}_filter_val_{i}", []),
+                    (f"{self.session_key}_filter_text_{i}", '')
+            ):
+                self._state[key] = st.session_state.get(key, default)
+
         # Render filter widgets
         active_filters = []
-        for i in range(st.session_state[f"{self.session_key}_active_filters"]):
+        for i in range(num_filters):
             filter_info = self._render_filter_widget(i)
             if filter_info:
                 active_filters.append(filter_info)